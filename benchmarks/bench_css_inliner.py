@@ -0,0 +1,41 @@
+# benchmarks/bench_css_inliner.py
+
+"""
+Benchmark for `utils.css_inliner`: inlines the same rendered emails with a fresh `Premailer` per document
+(the previous per-recipient behaviour) and with the precompiled `CSSInliner`, checks that both outputs are
+byte-identical and prints the per-document time of each.
+
+Usage:
+```
+python -m benchmarks.bench_css_inliner [documents]
+```
+"""
+
+import sys
+import time
+from premailer import Premailer
+from benchmarks.fixtures import render_sample
+from utils.css_inliner import CSSInliner, read_stylesheet
+
+def main(documents=200):
+    docs = [render_sample(i) for i in range(documents)]
+
+    start = time.perf_counter()
+    expected = [Premailer(html=doc, css_text=read_stylesheet()).transform() for doc in docs]
+    premailer_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    inliner = CSSInliner(read_stylesheet())
+    actual = [inliner.transform(doc) for doc in docs]
+    inliner_time = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(expected, actual) if a != b)
+    print(f"documents: {documents}, mismatches: {mismatches}")
+    print(f"premailer:  {premailer_time / documents * 1000:.2f} ms/doc")
+    print(f"compiled:   {inliner_time / documents * 1000:.2f} ms/doc (including one-time compilation)")
+    print(f"speedup:    {premailer_time / inliner_time:.1f}x")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,78 @@
+# benchmarks/bench_fetch_engine.py
+
+"""
+Benchmark for `utils.fetch_engine`: runs one request per provider against a local stub server with
+artificial delays, first serially and then through `FetchEngine`, and prints both wall times.
+It asserts that the concurrent run takes about as long as the slowest provider, well under the serial
+run, and that a call slower than the engine's `timeout` raises `FetchTimeoutError` after `timeout`.
+
+Usage:
+```
+python -m benchmarks.bench_fetch_engine
+```
+"""
+
+import time
+import requests
+from benchmarks.stub_server import StubServer
+from utils.fetch_engine import FetchEngine, FetchTimeoutError
+
+# Artificial latency per provider, in seconds
+PROVIDER_DELAYS = {
+    'gif': 0.30,
+    'quote': 0.20,
+    'weather': 0.40,
+    'news': 0.50,
+    'history': 0.35,
+    'fun_fact': 0.15,
+}
+
+# Allowed overhead over the slowest provider (thread start-up, local HTTP round trips)
+MARGIN = 0.15
+
+# Per-call timeout checked against a route that is slower than it
+TIMEOUT = 0.3
+SLOW_DELAY = 1.0
+
+def fetch(url):
+    return requests.get(url, timeout=5).json()
+
+def main():
+    routes = {f'/{name}': (b'{"ok": true}', 'application/json', delay) for name, delay in PROVIDER_DELAYS.items()}
+    routes['/slow'] = (b'{"ok": true}', 'application/json', SLOW_DELAY)
+    with StubServer(routes) as server:
+        tasks = {name: ('127.0.0.1', fetch, (f"{server.url}/{name}",)) for name in PROVIDER_DELAYS}
+
+        start = time.perf_counter()
+        serial = {name: func(*args) for name, (_, func, args) in tasks.items()}
+        serial_time = time.perf_counter() - start
+
+        with FetchEngine(max_workers=len(tasks), default_host_limit=len(tasks), timeout=5) as engine:
+            start = time.perf_counter()
+            concurrent = engine.run(tasks)
+            concurrent_time = time.perf_counter() - start
+
+        engine = FetchEngine(max_workers=1, timeout=TIMEOUT)
+        start = time.perf_counter()
+        try:
+            engine.run({'slow': ('127.0.0.1', fetch, (f"{server.url}/slow",))})
+            timed_out = False
+        except FetchTimeoutError:
+            timed_out = True
+        timeout_time = time.perf_counter() - start
+        engine.shutdown(wait=True)
+
+    slowest = max(PROVIDER_DELAYS.values())
+    print(f"sum of provider delays: {sum(PROVIDER_DELAYS.values()):.2f}s, slowest: {slowest:.2f}s")
+    print(f"serial:     {serial_time:.2f}s")
+    print(f"concurrent: {concurrent_time:.2f}s")
+    print(f"timeout:    raised after {timeout_time:.2f}s for a {SLOW_DELAY:.2f}s call with timeout={TIMEOUT:.2f}s")
+
+    assert serial == concurrent, "serial and concurrent results disagree"
+    assert concurrent_time < slowest + MARGIN, f"concurrent run took {concurrent_time:.2f}s, slowest provider is {slowest:.2f}s"
+    assert concurrent_time < serial_time / 2, f"concurrent run ({concurrent_time:.2f}s) is not well below serial ({serial_time:.2f}s)"
+    assert timed_out, f"no FetchTimeoutError for a {SLOW_DELAY}s call with timeout={TIMEOUT}s"
+    assert timeout_time < TIMEOUT + MARGIN, f"FetchTimeoutError raised after {timeout_time:.2f}s, timeout is {TIMEOUT}s"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_inline_css.py
+
+"""
+Benchmark for the legacy helper `utils.utils.inline_css` on the real email: `templates/email_template.html`
+rendered with the benchmark fixtures and the `static/css/` files in cascade order. It compares the previous
+implementation (one `soup.select` over the whole tree per selector, style strings appended per rule) with the
+indexed one, and checks every element's resolved style against the Premailer-based `CSSInliner`, which
+applies the same specificity-correct cascade.
+
+Usage:
+```
+python -m benchmarks.bench_inline_css [documents]
+```
+"""
+
+import sys
+import time
+import logging
+from benchmarks.fixtures import render_sample
+from utils.css_inliner import CSSInliner, read_stylesheet
+from utils.utils import inline_css
+
+def inline_css_select(html, css):
+    """
+    The previous `inline_css`: O(rules x DOM), with duplicate declarations in the style attributes.
+    """
+    import cssutils
+    from bs4 import BeautifulSoup
+    cssutils.log.setLevel(logging.CRITICAL)
+    soup = BeautifulSoup(html, 'html.parser')
+    style = cssutils.parseString(css)
+    for rule in style:
+        if rule.type == rule.STYLE_RULE:
+            for selector in rule.selectorList:
+                for tag in soup.select(selector.selectorText):
+                    if not tag.get('style'):
+                        tag['style'] = ''
+                    tag['style'] += f'{rule.style.cssText};'
+    style_tag = soup.new_tag('style')
+    style_tag.string = css
+    soup.head.append(style_tag)
+    return str(soup)
+
+def resolved_styles(document):
+    """
+    (tag name, {property: value}) for every element of the body, as a browser would resolve each style attribute.
+    """
+    import cssutils
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(document, 'html.parser')
+    return [
+        (tag.name, {prop.name: prop.value for prop in cssutils.parseStyle(tag.get('style', '')).getProperties()})
+        for tag in soup.body.find_all(True)
+    ]
+
+def declaration_count(document):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(document, 'html.parser')
+    return sum(tag['style'].count(':') for tag in soup.find_all(style=True))
+
+def timed(func, docs, css):
+    start = time.perf_counter()
+    outputs = [func(doc, css) for doc in docs]
+    return outputs, (time.perf_counter() - start) / len(docs) * 1000
+
+def main(documents=50):
+    css = read_stylesheet()
+    docs = [render_sample(i) for i in range(documents)]
+    # Warm the imports so neither side pays for them
+    inline_css_select(docs[0], css)
+    inline_css(docs[0], css)
+
+    legacy, legacy_ms = timed(inline_css_select, docs, css)
+    indexed, indexed_ms = timed(inline_css, docs, css)
+    reference = CSSInliner(css)
+    mismatches = sum(1 for doc, output in zip(docs, indexed) if resolved_styles(output) != resolved_styles(reference.transform(doc)))
+
+    print(f"documents: {documents}, cascade mismatches against CSSInliner: {mismatches}")
+    print(f"soup.select per selector: {legacy_ms:7.2f} ms/doc, {declaration_count(legacy[0])} inline declarations")
+    print(f"indexed:                  {indexed_ms:7.2f} ms/doc, {declaration_count(indexed[0])} inline declarations")
+    print(f"speedup:                  {legacy_ms / indexed_ms:.1f}x")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,64 @@
+# benchmarks/bench_logging.py
+
+"""
+Logging throughput benchmark for `utils.logging_setup`. It times the calling thread while it emits the
+per-recipient log lines of a send loop (a short line, an f-string line and a long quote-sized line), with:
+- logging off (level WARNING, the calls return immediately),
+- synchronous handlers (file + console, the previous behaviour),
+- queue mode (`LOG_QUEUE=1`), where a listener thread does the formatting and I/O,
+- queue mode with JSON lines (`LOG_JSON=1`).
+
+Console output is redirected to /dev/null, so the numbers reflect the handlers and not the terminal. For queue
+modes the time to drain the queue (`stop_logging()`) is reported separately.
+
+Usage:
+```
+python -m benchmarks.bench_logging [records]
+```
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+from utils.logging_setup import setup_logging, stop_logging
+
+LONG_LINE = "Quote: " + "The only way to do great work is to love what you do. " * 8
+
+def emit(records):
+    for index in range(records // 3):
+        logging.info("Creating email content.")
+        logging.info(f"Email sent to recipient{index}@example.com")
+        logging.info(LONG_LINE)
+
+def run(mode, records, directory):
+    use_queue = mode.startswith('queue')
+    setup_logging(log_folder=directory, use_queue=use_queue, json_format=mode == 'queue+json')
+    if mode == 'off':
+        logging.getLogger().setLevel(logging.WARNING)
+    start = time.perf_counter()
+    emit(records)
+    caller = time.perf_counter() - start
+    stop_logging()
+    total = time.perf_counter() - start
+    logging.getLogger().handlers.clear()
+    return caller, total
+
+def main(records=60000):
+    directory = tempfile.mkdtemp(prefix='bench_logging_')
+    stderr = sys.stderr
+    sys.stderr = open(os.devnull, 'w')
+    try:
+        results = [(mode, *run(mode, records, directory)) for mode in ('off', 'sync', 'queue', 'queue+json')]
+    finally:
+        sys.stderr.close()
+        sys.stderr = stderr
+        shutil.rmtree(directory, ignore_errors=True)
+    for mode, caller, total in results:
+        print(f"{mode:<11} {records / caller:>10.0f} records/sec in the calling thread "
+              f"({caller / records * 1e6:6.2f} us each), {total:.2f} s until fully written")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 60000)
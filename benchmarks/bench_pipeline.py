@@ -0,0 +1,158 @@
+# benchmarks/bench_pipeline.py
+
+"""
+End-to-end benchmark of the daily `main.py` run against local stand-ins, without network access:
+- a stub HTTP server (`benchmarks/stub_server.py`) replaying the recorded Giphy, Quotable, OpenWeather,
+  Google News RSS, muffinlabs and Useless Facts responses in `benchmarks/recordings/` with a configurable
+  latency, reached through `PROVIDER_BASE_URL`,
+- a local SMTP sink (`benchmarks/smtp_sink.py`),
+- synthetic `keys.xlsx` files (10, 1k and 100k recipients by default).
+
+Each size runs `python main.py` in a fresh working directory (copies of `templates/` and `static/`) and
+reports recipients/sec, the per-stage timings from the run's `logs/perf_report_*.json` and the peak RSS of
+the process. Extra environment variables (e.g. `RENDER_WORKERS=4`) are passed through to `main.py`.
+
+Usage (Linux/macOS):
+```
+python -m benchmarks.bench_pipeline [sizes] [latency_seconds] [output.json]
+python -m benchmarks.bench_pipeline 10,1000 0.05
+```
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import subprocess
+import tempfile
+from benchmarks.stub_server import StubServer
+from benchmarks.smtp_sink import SMTPSink
+from utils.recipient_source import write_rows
+from utils.utils import GIPHY_HOST, QUOTABLE_HOST, OPENWEATHER_HOST, MUFFINLABS_HOST, GOOGLE_NEWS_HOST, USELESS_FACTS_HOST
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECORDINGS = os.path.join(ROOT, 'benchmarks', 'recordings')
+
+# Recorded response per provider host: (file, content type)
+RECORDED_RESPONSES = {
+    GIPHY_HOST: ('giphy_random.json', 'application/json'),
+    QUOTABLE_HOST: ('quotable_random.json', 'application/json'),
+    OPENWEATHER_HOST: ('openweather_forecast.json', 'application/json'),
+    MUFFINLABS_HOST: ('muffinlabs_date.json', 'application/json'),
+    GOOGLE_NEWS_HOST: ('google_news_search.rss', 'application/xml; charset=utf-8'),
+    USELESS_FACTS_HOST: ('uselessfacts_random.json', 'application/json'),
+}
+
+COLUMNS = ['Nickname', 'Email', 'Days Receiving the email', 'Interests', 'Current City', 'Current Country']
+CITIES = [('Toronto', 'CA'), ('Montreal', 'CA'), ('Vancouver', 'CA'), ('Paris', 'FR'), ('London', 'GB'), ('Berlin', 'DE')]
+INTERESTS = ['AI, Technology', 'Science', 'Finance, Sports', 'Space', 'Python, AI', 'Climate, Science, Travel']
+
+def provider_routes(latency=0.0):
+    """
+    Stub server routes replaying the recorded responses under `/<provider host>/`.
+    """
+    routes = {}
+    for host, (filename, content_type) in RECORDED_RESPONSES.items():
+        with open(os.path.join(RECORDINGS, filename), 'rb') as f:
+            routes[f'/{host}/'] = (f.read(), content_type, latency)
+    return routes
+
+def synthetic_rows(count):
+    for index in range(count):
+        city, country = CITIES[index % len(CITIES)]
+        yield {
+            'Nickname': f'Recipient {index}',
+            'Email': f'recipient{index}@example.com',
+            'Days Receiving the email': index % 365,
+            'Interests': INTERESTS[index % len(INTERESTS)],
+            'Current City': city,
+            'Current Country': country,
+        }
+
+def prepare_workdir(count):
+    directory = tempfile.mkdtemp(prefix=f'bench_pipeline_{count}_')
+    for folder in ('templates', 'static'):
+        shutil.copytree(os.path.join(ROOT, folder), os.path.join(directory, folder))
+    os.makedirs(os.path.join(directory, 'data_files'))
+    write_rows(os.path.join(directory, 'data_files', 'keys.xlsx'), synthetic_rows(count), COLUMNS)
+    return directory
+
+def run_main(directory, env):
+    """
+    Run `main.py` in `directory` and return (wall seconds, peak RSS in MB).
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'main.py')], cwd=directory, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"main.py exited with {process.returncode}; see the logs in {directory}/logs")
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    peak = usage.ru_maxrss / (1024 * 1024) if sys.platform == 'darwin' else usage.ru_maxrss / 1024
+    return elapsed, peak
+
+def bench_size(count, latency):
+    directory = prepare_workdir(count)
+    try:
+        with StubServer(provider_routes(latency)) as server, SMTPSink() as sink:
+            env = dict(
+                os.environ,
+                PYTHONPATH=ROOT,
+                PROVIDER_BASE_URL=server.url,
+                SMTP_HOST=sink.host,
+                SMTP_PORT=str(sink.port),
+                SMTP_SSL='0',
+                GMAIL_USER=os.getenv('BENCH_FROM', 'bench@example.com'),
+                GMAIL_PASSWORD='',
+                HTTP_RETRIES='0',
+            )
+            elapsed, peak = run_main(directory, env)
+            delivered, http_requests = sink.messages, server.requests
+        with open(sorted(glob.glob(os.path.join(directory, 'logs', 'perf_report_*.json')))[-1], encoding='utf-8') as f:
+            report = json.load(f)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if delivered != count:
+        print(f"WARNING: {delivered} of {count} emails reached the SMTP sink")
+    return {
+        'recipients': count,
+        'delivered': delivered,
+        'http_requests': http_requests,
+        'wall_seconds': elapsed,
+        'recipients_per_sec': delivered / elapsed if elapsed else 0.0,
+        'pipeline_per_sec': (report.get('pipeline') or {}).get('end_to_end', {}).get('per_sec', 0.0),
+        'peak_rss_mb': peak,
+        'stages': report['stages'],
+    }
+
+def print_result(result):
+    print(f"\n{result['recipients']} recipients: {result['delivered']} delivered in {result['wall_seconds']:.1f} s "
+          f"({result['recipients_per_sec']:.1f}/sec overall, {result['pipeline_per_sec']:.1f}/sec in the pipeline), "
+          f"{result['http_requests']} HTTP requests, peak RSS {result['peak_rss_mb']:.0f} MB")
+    for stage, summary in result['stages'].items():
+        print(f"  {stage:<28} {summary['count']:>8} calls  p50 {summary['p50_ms']:8.2f} ms  "
+              f"p95 {summary['p95_ms']:8.2f} ms  max {summary['max_ms']:8.2f} ms")
+
+def main(sizes=(10, 1000, 100_000), latency=0.05, output=None):
+    results = []
+    for count in sizes:
+        result = bench_size(count, latency)
+        print_result(result)
+        results.append(result)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'latency': latency, 'results': results}, f, indent=2)
+        print(f"\nResults written to {output}")
+    return results
+
+if __name__ == "__main__":
+    main(
+        tuple(int(size) for size in sys.argv[1].split(',')) if len(sys.argv) > 1 else (10, 1000, 100_000),
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.05,
+        sys.argv[3] if len(sys.argv) > 3 else None,
+    )
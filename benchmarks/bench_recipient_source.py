@@ -0,0 +1,93 @@
+# benchmarks/bench_recipient_source.py
+
+"""
+Peak-memory benchmark for streaming recipient lists (1M rows by default). Each mode runs in a fresh process
+and reports its peak RSS:
+- stream: iterate the file with `utils.recipient_source.iter_row_chunks`,
+- store: import the file into a `RecipientStore` and iterate `recipients()` (the path `main.py` uses),
+- pandas: load the file into a DataFrame and build the recipient list with `iterrows` (the previous behaviour).
+
+Usage (Linux/macOS, formats: csv, jsonl, xlsx):
+```
+python -m benchmarks.bench_recipient_source [rows] [format]
+```
+"""
+
+import os
+import sys
+import time
+import shutil
+import resource
+import tempfile
+import multiprocessing
+from utils.recipient_source import write_rows
+
+COLUMNS = ['Nickname', 'Email', 'Days Receiving the email', 'Interests', 'Current City', 'Current Country']
+
+def synthetic_rows(count):
+    for index in range(count):
+        yield {
+            'Nickname': f'User {index}',
+            'Email': f'user{index}@example.com',
+            'Days Receiving the email': index % 365,
+            'Interests': 'AI, Technology' if index % 2 else 'Science',
+            'Current City': f'City {index % 500}',
+            'Current Country': 'CA',
+        }
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_mode(mode, path, directory, results):
+    start = time.perf_counter()
+    count = 0
+    if mode == 'stream':
+        from utils.recipient_source import iter_row_chunks
+        for chunk in iter_row_chunks(path, chunk_size=5000):
+            count += len(chunk)
+    elif mode == 'store':
+        from utils.recipient_store import RecipientStore
+        store = RecipientStore(os.path.join(directory, 'recipients.sqlite'))
+        store.import_file(path)
+        for _ in store.recipients():
+            count += 1
+        store.close()
+    else:
+        import pandas as pd
+        if path.endswith('.csv'):
+            df = pd.read_csv(path)
+        elif path.endswith('.jsonl'):
+            df = pd.read_json(path, lines=True)
+        else:
+            df = pd.read_excel(path)
+        recipients = [
+            (row['Nickname'], row['Email'], int(row['Days Receiving the email']) + 1, row['Interests'], row['Current City'], row['Current Country'])
+            for _, row in df.dropna(subset=['Email']).iterrows()
+        ]
+        count = len(recipients)
+    results.put((mode, count, time.perf_counter() - start, peak_rss_mb()))
+
+def main(count=1_000_000, extension='csv'):
+    directory = tempfile.mkdtemp(prefix='recipient_source_')
+    try:
+        path = os.path.join(directory, f'keys.{extension}')
+        start = time.perf_counter()
+        write_rows(path, synthetic_rows(count), COLUMNS)
+        print(f"wrote {count} rows to {extension} in {time.perf_counter() - start:.1f} s "
+              f"({os.path.getsize(path) / (1024 * 1024):.1f} MB)")
+
+        context = multiprocessing.get_context('spawn')
+        for mode in ('stream', 'store', 'pandas'):
+            results = context.Queue()
+            process = context.Process(target=run_mode, args=(mode, path, directory, results))
+            process.start()
+            mode, rows, elapsed, peak = results.get()
+            process.join()
+            print(f"{mode:<7} {rows} rows in {elapsed:6.1f} s, peak RSS {peak:7.1f} MB")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000, sys.argv[2] if len(sys.argv) > 2 else 'csv')
@@ -0,0 +1,81 @@
+# benchmarks/bench_recipient_store.py
+
+"""
+Benchmark for `utils.recipient_store` with synthetic recipients (100k by default):
+- loading the recipient tuples from the SQLite store versus `iterrows` over a DataFrame (the previous behaviour),
+- lookups by email,
+- counter updates committed one by one versus a boolean mask over the 'Email' column per update.
+
+Usage:
+```
+python -m benchmarks.bench_recipient_store [recipients]
+```
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import pandas as pd
+from utils.recipient_store import RecipientStore, COLUMNS
+
+def synthetic_rows(count):
+    return [
+        {
+            'Nickname': f'User {index}',
+            'Email': f'user{index}@example.com',
+            'Days Receiving the email': index % 365,
+            'Interests': 'AI, Technology' if index % 2 else 'Science',
+            'Current City': f'City {index % 500}',
+            'Current Country': 'CA',
+        }
+        for index in range(count)
+    ]
+
+def main(count=100_000, updates=1000):
+    rows = synthetic_rows(count)
+    directory = tempfile.mkdtemp(prefix='recipient_store_')
+    try:
+        store = RecipientStore(os.path.join(directory, 'recipients.sqlite'))
+        start = time.perf_counter()
+        store.import_rows(rows, list(COLUMNS))
+        print(f"import {count} rows:             {time.perf_counter() - start:.3f} s")
+        store.close()
+
+        # A fresh store, as at the start of a run
+        start = time.perf_counter()
+        store = RecipientStore(os.path.join(directory, 'recipients.sqlite'))
+        recipients = list(store.recipients())
+        print(f"store load:                     {time.perf_counter() - start:.3f} s ({len(recipients)} recipients)")
+
+        df = pd.DataFrame(rows)
+        start = time.perf_counter()
+        legacy = [
+            (row['Nickname'], row['Email'], int(row['Days Receiving the email']) + 1, row['Interests'], row['Current City'], row['Current Country'])
+            for _, row in df.dropna(subset=['Email']).iterrows()
+        ]
+        print(f"DataFrame iterrows load:        {time.perf_counter() - start:.3f} s ({len(legacy)} recipients)")
+        assert recipients == legacy, "store and DataFrame disagree"
+
+        emails = [f'user{index * (count // updates)}@example.com' for index in range(updates)]
+        start = time.perf_counter()
+        for email in emails:
+            store.get(email)
+        print(f"{updates} lookups by email:        {(time.perf_counter() - start) / updates * 1e6:.1f} us each")
+
+        start = time.perf_counter()
+        for email in emails:
+            store.increment_counter(email)
+        print(f"{updates} committed updates:       {(time.perf_counter() - start) / updates * 1e6:.1f} us each")
+
+        start = time.perf_counter()
+        for email in emails:
+            df.loc[df['Email'] == email, 'Days Receiving the email'] += 1
+        print(f"{updates} DataFrame mask updates:  {(time.perf_counter() - start) / updates * 1e6:.1f} us each")
+        store.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,54 @@
+# benchmarks/bench_rss.py
+
+"""
+Micro-benchmark for `utils.utils.parse_news_items` against the previous BeautifulSoup path of `fetch_news`
+(`BeautifulSoup(content, features="xml").findAll('item')[:n]`), on the recorded Google News feed
+(`benchmarks/recordings/google_news_search.rss`) and on the same feed grown to several hundred items.
+Both parsers must return the same article dicts.
+
+Usage:
+```
+python -m benchmarks.bench_rss [iterations] [num_articles]
+```
+"""
+
+import os
+import sys
+import time
+from utils.utils import parse_news_items
+
+RECORDED_FEED = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings', 'google_news_search.rss')
+
+def parse_with_beautifulsoup(content, num_articles=3):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, features="xml")
+    return [
+        {'title': item.title.text, 'link': item.link.text, 'pub_date': item.pubDate.text}
+        for item in soup.find_all('item')[:num_articles]
+    ]
+
+def grown_feed(content, copies):
+    head, rest = content.split(b'<item>', 1)
+    items, tail = rest.rsplit(b'</item>', 1)
+    items = b'<item>' + items + b'</item>'
+    return head + items * copies + tail
+
+def timed(func, content, num_articles, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(content, num_articles)
+    return (time.perf_counter() - start) / iterations * 1000
+
+def main(iterations=200, num_articles=3):
+    with open(RECORDED_FEED, 'rb') as f:
+        recorded = f.read()
+    feeds = {'recorded (30 items)': recorded, 'grown (300 items)': grown_feed(recorded, 10)}
+    for name, content in feeds.items():
+        expected = parse_with_beautifulsoup(content, num_articles)
+        assert parse_news_items(content, num_articles) == expected, f"parsers disagree on {name}"
+        soup_ms = timed(parse_with_beautifulsoup, content, num_articles, iterations)
+        stream_ms = timed(parse_news_items, content, num_articles, iterations)
+        print(f"{name:<20} BeautifulSoup {soup_ms:7.3f} ms   streaming {stream_ms:7.3f} ms   ({soup_ms / stream_ms:.0f}x)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200, int(sys.argv[2]) if len(sys.argv) > 2 else 3)
@@ -0,0 +1,43 @@
+# benchmarks/bench_skeleton.py
+
+"""
+Regression check and benchmark for `utils.skeleton`: renders a set of synthetic recipients with the
+single-phase render (`render_full`) and with the two-phase skeleton, verifies the outputs are identical
+and prints the per-recipient time of each.
+
+Usage:
+```
+python -m benchmarks.bench_skeleton [recipients]
+```
+"""
+
+import sys
+import time
+import jinja2
+from benchmarks.fixtures import SHARED_CONTENT, template_context
+from utils.css_inliner import CSSInliner, read_stylesheet
+from utils.skeleton import EmailSkeleton, render_full
+
+def main(recipients=200):
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader('templates'))
+    inliner = CSSInliner(read_stylesheet())
+    contexts = [template_context(i) for i in range(recipients)]
+
+    start = time.perf_counter()
+    expected = [render_full(env, inliner, context) for context in contexts]
+    full_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    skeleton = EmailSkeleton(env, inliner, SHARED_CONTENT)
+    actual = [skeleton.render(context) for context in contexts]
+    skeleton_time = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(expected, actual) if a != b)
+    print(f"recipients: {recipients}, mismatches: {mismatches}")
+    print(f"full render: {full_time / recipients * 1000:.2f} ms/recipient")
+    print(f"skeleton:    {skeleton_time / recipients * 1000:.2f} ms/recipient (including phase one)")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,84 @@
+# benchmarks/bench_startup.py
+
+"""
+Startup benchmark for `main.py` based on `python -X importtime`. It imports `main` in a fresh interpreter
+(from a temporary working directory, so the log file it creates does not land in the repository), reports
+the cumulative import time of `main` and its heaviest dependencies, and checks two thresholds:
+- the import time of `main` (best of several runs) stays under the budget,
+- none of the lazily imported modules (`LAZY_MODULES`) is imported at startup.
+
+The script exits with status 1 when a threshold is exceeded, so it can gate a CI job or a deploy step.
+
+Usage:
+```
+python -m benchmarks.bench_startup [budget_ms] [runs]
+```
+"""
+
+import os
+import re
+import sys
+import subprocess
+import tempfile
+
+# Dependencies only needed by specific features, which must not be imported by `import main`
+LAZY_MODULES = ('pandas', 'crossword', 'cssutils', 'bs4', 'openpyxl', 'premailer', 'lxml', 'jinja2', 'requests', 'flask')
+
+_importtime_regex = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def import_times(module='main'):
+    """
+    Import `module` in a fresh interpreter with `-X importtime`.
+
+    Returns:
+        dict: Cumulative import time in microseconds of `module` and everything it imported, keyed by module name.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    with tempfile.TemporaryDirectory(prefix='startup_') as directory:
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                cwd=directory, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    # Children are reported before their parent; top-level imports have a single space of indentation
+    times, subtree = {}, {}
+    for line in result.stderr.splitlines():
+        match = _importtime_regex.match(line)
+        if not match:
+            continue
+        name, cumulative = match.group(4), int(match.group(2))
+        subtree[name] = cumulative
+        if len(match.group(3)) == 1:
+            if name == module:
+                times = subtree
+            subtree = {}
+    return times
+
+def main(budget_ms=150.0, runs=5):
+    best = None
+    for _ in range(runs):
+        times = import_times()
+        if best is None or times['main'] < best['main']:
+            best = times
+
+    total_ms = best['main'] / 1000
+    print(f"import main: {total_ms:.1f} ms (best of {runs}, budget {budget_ms:.0f} ms)")
+    print("heaviest imports:")
+    heaviest = sorted(((us, name) for name, us in best.items() if name != 'main'), reverse=True)[:10]
+    for us, name in heaviest:
+        print(f"  {us / 1000:7.1f} ms  {name}")
+
+    eager = sorted({name.split('.')[0] for name in best} & set(LAZY_MODULES))
+    failed = False
+    if eager:
+        print(f"FAIL: imported at startup but expected to be lazy: {', '.join(eager)}")
+        failed = True
+    if total_ms > budget_ms:
+        print(f"FAIL: import main took {total_ms:.1f} ms, over the {budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(float(sys.argv[1]) if len(sys.argv) > 1 else 150.0, int(sys.argv[2]) if len(sys.argv) > 2 else 5))
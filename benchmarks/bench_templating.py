@@ -0,0 +1,58 @@
+# benchmarks/bench_templating.py
+
+"""
+Micro-benchmark for `utils.templating`: measures the latency of rendering `email_template.html`
+- with a new plain `jinja2.Environment` per render (the previous behaviour),
+- cold: a new cached environment with an empty bytecode cache,
+- warm bytecode: a new cached environment whose bytecode cache is already populated (a new process),
+- warm: the same environment rendering again (the steady state within a run).
+
+Usage:
+```
+python -m benchmarks.bench_templating [iterations]
+```
+"""
+
+import sys
+import time
+import shutil
+import tempfile
+import jinja2
+from benchmarks.fixtures import template_context
+from utils.templating import create_environment
+
+def timed(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+def main(iterations=50):
+    context = template_context()
+    cache_dir = tempfile.mkdtemp(prefix='jinja_cache_')
+    try:
+        def uncached():
+            jinja2.Environment(loader=jinja2.FileSystemLoader('templates')).get_template('email_template.html').render(**context)
+
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            create_environment(cache_dir=cache_dir).get_template('email_template.html').render(**context)
+
+        def warm_bytecode():
+            create_environment(cache_dir=cache_dir).get_template('email_template.html').render(**context)
+
+        env = create_environment(cache_dir=cache_dir)
+        env.get_template('email_template.html')
+
+        def warm():
+            env.get_template('email_template.html').render(**context)
+
+        print(f"new environment per render: {timed(uncached, iterations):.3f} ms")
+        print(f"cold cache:                 {timed(cold, iterations):.3f} ms")
+        print(f"warm bytecode cache:        {timed(warm_bytecode, iterations):.3f} ms")
+        print(f"warm environment:           {timed(warm, iterations):.3f} ms")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
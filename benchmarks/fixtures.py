@@ -0,0 +1,63 @@
+# benchmarks/fixtures.py
+
+"""
+Fixture data shared by the benchmarks: a complete template context for `templates/email_template.html`
+that matches what `main.create_email_content` passes to the renderer, plus helpers to vary it per recipient.
+"""
+
+import jinja2
+
+SHARED_CONTENT = {
+    'gif_url': 'https://media.giphy.com/media/fixture/giphy.gif',
+    'quote': "Believe you can and you're halfway there. - Theodore Roosevelt",
+    'history_fact': '1969: Apollo 11 lands on the Moon.',
+    'birthdays': ['1919: Edmund Hillary, New Zealand mountaineer', '1938: Diana Rigg, English actress', '1947: Carlos Santana, Mexican-American guitarist'],
+    'deaths': ['1973: Bruce Lee, American-Hong Kong actor', '1937: Guglielmo Marconi, Italian inventor', '2011: Lucian Freud, German-English painter'],
+    'fun_fact': 'Honey never spoils.',
+}
+
+WEATHER_SAMPLES = [
+    '21.3°C (Min: 14.2°C, Max: 24.8°C), clear sky',
+    '12.0°C (Min: 9.5°C, Max: 13.1°C), light rain',
+    '-3.4°C (Min: -7.0°C, Max: -1.2°C), snow',
+    '17.8°C (Min: 15.0°C, Max: 19.9°C), overcast clouds',
+]
+
+TOPICS = ['AI', 'Python', 'Space', 'Climate', 'Finance']
+
+def sample_articles(topic, count=3):
+    return [
+        {'title': f'{topic} headline {i}', 'link': f'https://news.example.com/{topic.lower()}/{i}', 'pub_date': 'Mon, 20 Jul 2026 08:00:00 GMT'}
+        for i in range(count)
+    ]
+
+def template_context(index=0):
+    """
+    Return the full render context for the `index`-th synthetic recipient.
+    """
+    weather = WEATHER_SAMPLES[index % len(WEATHER_SAMPLES)]
+    description = weather.split(',')[-1].strip()
+    topics = [TOPICS[index % len(TOPICS)], TOPICS[(index + 2) % len(TOPICS)]]
+    return dict(
+        SHARED_CONTENT,
+        USER_NAME=f'Recipient {index}',
+        current_date='Monday, July 20, 2026',
+        counter=index + 1,
+        weather=weather,
+        weather_icon='☀️',
+        weather_description=description,
+        weather_tip='Check the forecast for detailed weather information.',
+        weather_class=f"weather-widget__{description.lower().replace(' ', '-')}",
+        city='Toronto',
+        country='CA',
+        news_by_topic={topic: sample_articles(topic) for topic in topics},
+    )
+
+def render_sample(index=0, templates='templates'):
+    """
+    Render `email_template.html` for the `index`-th synthetic recipient with the stylesheet link removed,
+    exactly as `main.create_email_content` hands it to the CSS inliner.
+    """
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(templates))
+    html = env.get_template('email_template.html').render(**template_context(index))
+    return html.replace('<link rel="stylesheet" href="static/css/email_style.css">', '')
@@ -0,0 +1,90 @@
+# benchmarks/smtp_sink.py
+
+"""
+This script provides a local SMTP sink used by the benchmarks to stand in for the real SMTP server. It speaks
+just enough SMTP for `smtplib` (EHLO/HELO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT), accepts every message
+and discards it after counting it.
+
+Features:
+1. **No Dependencies**: Built on `socketserver`, one thread per connection, so pooled connections from
+   `utils.send_email.SMTPSender` are served concurrently.
+2. **Counters**: `messages` and `bytes` count the accepted messages and their size.
+3. **Artificial Latency**: `delay` seconds are slept before acknowledging each message, to model a slow relay.
+
+Example:
+```
+from benchmarks.smtp_sink import SMTPSink
+
+with SMTPSink() as sink:
+    os.environ.update(SMTP_HOST=sink.host, SMTP_PORT=str(sink.port), SMTP_SSL='0')
+    ...
+print(sink.messages)
+```
+"""
+
+import time
+import threading
+import socketserver
+
+class SMTPSink:
+    def __init__(self, host='127.0.0.1', port=0, delay=0.0):
+        """
+        Args:
+            host (str): Interface to bind.
+            port (int): Port to bind, 0 picks a free port.
+            delay (float): Seconds to wait before acknowledging each message.
+        """
+        self.messages = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(line + b'\r\n')
+
+            def handle(self):
+                self.reply(b'220 smtp-sink ready')
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line[:4].upper()
+                    if command == b'EHLO':
+                        self.wfile.write(b'250-smtp-sink\r\n250-8BITMIME\r\n250 AUTH PLAIN LOGIN\r\n')
+                    elif command == b'AUTH':
+                        self.reply(b'235 Authentication successful')
+                    elif command == b'DATA':
+                        self.reply(b'354 End data with <CR><LF>.<CR><LF>')
+                        size = 0
+                        while True:
+                            data = self.rfile.readline()
+                            if not data or data == b'.\r\n':
+                                break
+                            size += len(data)
+                        if delay:
+                            time.sleep(delay)
+                        with sink._lock:
+                            sink.messages += 1
+                            sink.bytes += size
+                        self.reply(b'250 OK: queued')
+                    elif command == b'QUIT':
+                        self.reply(b'221 Bye')
+                        return
+                    else:
+                        # HELO, MAIL, RCPT, RSET, NOOP
+                        self.reply(b'250 OK')
+
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address[:2]
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
@@ -0,0 +1,71 @@
+# benchmarks/stub_server.py
+
+"""
+This script provides a local stub HTTP server used by the benchmarks to stand in for the external providers.
+Each route replies with a canned body after an artificial delay, so timings are reproducible without network access.
+
+Features:
+1. **Canned Routes**: Maps a path prefix to `(body, content_type, delay)`; the longest matching prefix wins.
+2. **Artificial Latency**: Sleeps `delay` seconds before answering to model a slow upstream.
+3. **Background Thread**: Serves requests on a `ThreadingHTTPServer` in a daemon thread.
+
+Example:
+```
+from benchmarks.stub_server import StubServer
+
+with StubServer({'/slow': (b'{}', 'application/json', 0.5)}) as server:
+    requests.get(f"{server.url}/slow")
+```
+"""
+
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubServer:
+    def __init__(self, routes, host='127.0.0.1', port=0):
+        """
+        Args:
+            routes (dict): Mapping of path prefix to a `(body, content_type, delay)` tuple.
+            host (str): Interface to bind.
+            port (int): Port to bind, 0 picks a free port.
+        """
+        self.routes = routes
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stub.requests += 1
+                matches = [prefix for prefix in stub.routes if self.path.startswith(prefix)]
+                if not matches:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body, content_type, delay = stub.routes[max(matches, key=len)]
+                time.sleep(delay)
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
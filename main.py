@@ -52,13 +52,17 @@ import traceback
 from dotenv import load_dotenv
 from datetime import datetime
 from utils.logging_setup import setup_logging
-from utils.send_email import send_email
-from utils.utils import get_gif, get_quote, get_weather, get_weather_icon, get_weather_tip, get_this_day_in_history, fetch_news, get_historical_birthdays, get_historical_deaths, get_fun_fact, read_file, get_email_recipients, update_recipient_counter
-import io
+from utils.send_email import BulkSender
+from utils.pipeline import run_pipeline, log_pipeline_report
+from utils.fetch_engine import engine_from_env
+from utils.http_client import connection_stats, log_connection_stats
+from utils.response_cache import cache_stats, log_cache_stats
+from utils.recipient_store import open_store
+from utils.delivery_journal import open_journal
+from utils.preview_writer import open_preview_writer
+from utils.instrumentation import profiled, log_stage_summary, write_report
+from utils.utils import get_gif, get_quote, get_weather, get_weather_icon, get_weather_tip, get_this_day_in_history, fetch_news, get_historical_birthdays, get_historical_deaths, get_fun_fact, plan_recipient_fetches, normalize_topic, split_interests, GIPHY_HOST, QUOTABLE_HOST, OPENWEATHER_HOST, MUFFINLABS_HOST, GOOGLE_NEWS_HOST, USELESS_FACTS_HOST
 import pytz
-import jinja2
-from premailer import Premailer
-import pandas as pd
 
 # Set up logging with the script name
 log_filename = setup_logging(log_folder='logs', log_level=logging.INFO, log_format='%(script_name)s - %(asctime)s %(message)s')
@@ -68,42 +72,120 @@ logging.info("Script started.")
 load_dotenv()
 logging.info("Environment variables loaded.")
 
-def load_keys():
+KEYS_FILE = os.getenv('KEYS_FILE', 'data_files/keys.xlsx')
+
+def load_recipient_store():
+    """
+    Open the recipient store, importing `keys.xlsx` first if it was edited since the last import or export.
+    A failed import aborts the run: sending from, and exporting, the previous import would overwrite the edits.
+    """
+    store = open_store()
     try:
-        return pd.read_excel('data_files/keys.xlsx')
+        store.sync_from_file(KEYS_FILE)
     except Exception as e:
-        logging.error(f"Error loading keys: {e}")
-        return pd.DataFrame()
-    
-def create_email_content(counter, username, interests, city, country):
+        logging.error(f"Error loading keys from {KEYS_FILE}: {e}")
+        store.close()
+        raise
+    return store
+
+def pending_recipients(store, delivered):
+    """
+    Lazily yield the store's recipients, skipping those already delivered today.
+    """
+    for recipient in store.recipients():
+        if recipient[1] not in delivered:
+            yield recipient
+
+def run_fetches(tasks, engine=None):
+    """
+    Run named provider calls concurrently, using a temporary engine when none is given.
+    """
+    if engine is not None:
+        return engine.run(tasks)
+    with engine_from_env() as engine:
+        return engine.run(tasks)
+
+def fetch_shared_content(engine=None):
+    """
+    Fetch the daily content that is identical for every recipient (GIF, quote, history and fun fact).
+    Called once at the start of a run so the per-recipient loop only fetches weather and news.
+
+    Args:
+        engine (Optional[FetchEngine]): Engine used to run the provider calls concurrently.
+
+    Returns:
+        dict: Shared template fields keyed by their template variable names.
+    """
+    logging.info("Fetching shared daily content.")
+    return run_fetches({
+        'gif_url': (GIPHY_HOST, get_gif, ()),
+        'quote': (QUOTABLE_HOST, get_quote, ()),
+        'history_fact': (MUFFINLABS_HOST, get_this_day_in_history, ()),
+        'birthdays': (MUFFINLABS_HOST, get_historical_birthdays, ()),
+        'deaths': (MUFFINLABS_HOST, get_historical_deaths, ()),
+        'fun_fact': (USELESS_FACTS_HOST, get_fun_fact, ()),
+    }, engine)
+
+def fetch_recipient_content(email_recipients, engine=None):
+    """
+    Fetch weather and news for every unique (city, country) pair and normalized topic across all
+    recipients, so each location and topic is requested exactly once per run.
+
+    Args:
+        email_recipients (Iterable[tuple]): Tuples as yielded by `RecipientStore.recipients`.
+        engine (Optional[FetchEngine]): Engine used to run the provider calls concurrently.
+
+    Returns:
+        dict: {'weather': {(city, country): weather}, 'news': {normalized_topic: articles}}
+    """
+    plan = plan_recipient_fetches(email_recipients)
+    logging.info(f"Fetching weather for {len(plan['locations'])} locations and news for {len(plan['topics'])} topics.")
+    tasks = {}
+    for city, country in plan['locations']:
+        tasks[('weather', (city, country))] = (OPENWEATHER_HOST, get_weather, (city, country))
+    for topic in plan['topics']:
+        tasks[('news', topic)] = (GOOGLE_NEWS_HOST, fetch_news, (topic,))
+    recipient_content = {'weather': {}, 'news': {}}
+    for (kind, key), result in run_fetches(tasks, engine).items():
+        recipient_content[kind][key] = result
+    fetched = len(plan['locations']) + len(plan['topics'])
+    logging.info(f"Deduplication saved {plan['requested'] - fetched} of {plan['requested']} weather/news requests.")
+    return recipient_content
+
+def create_email_content(counter, username, interests, city, country, shared_content=None, recipient_content=None):
+    # Rendering dependencies (jinja2, premailer, cssutils, lxml) are imported on the first render only
+    import jinja2
+    from utils.css_inliner import get_inliner
+    from utils.skeleton import get_skeleton, render_full
+    from utils.templating import get_environment
     logging.info("Creating email content.")
     try:
-        gif_url = get_gif()
-        quote = get_quote()
-        weather = get_weather(city, country)
+        if shared_content is None:
+            shared_content = fetch_shared_content()
+        if recipient_content is None:
+            recipient_content = fetch_recipient_content([(username, None, counter, interests, city, country)])
+        weather = recipient_content['weather'].get((city, country))
+        if weather is None:
+            weather = get_weather(city, country)
         weather_description = weather.split(',')[-1].strip()
         weather_icon = get_weather_icon(weather_description)
         weather_tip = get_weather_tip(weather_description)
         weather_class = f"weather-widget__{weather_description.lower().replace(' ', '-')}"
-        history_fact = get_this_day_in_history()
-        fun_fact = get_fun_fact()
-        
+
         # Fetch news for each interest
         news_by_topic = {}
-        for topic in interests.split(','):
-            topic = topic.strip()
-            news_by_topic[topic] = fetch_news(topic)
-        
-        birthdays = get_historical_birthdays()
-        deaths = get_historical_deaths()
+        for topic in split_interests(interests):
+            articles = recipient_content['news'].get(normalize_topic(topic))
+            if articles is None:
+                articles = fetch_news(topic)
+            news_by_topic[topic] = articles
         
         current_date = datetime.now(pytz.timezone(os.getenv('TIMEZONE', 'UTC'))).strftime("%A, %B %d, %Y")
         
-        # Set up the Jinja2 environment with the correct template loader
-        env = jinja2.Environment(loader=jinja2.FileSystemLoader('templates'))
-        template = env.get_template('email_template.html')
+        # Reuse the process-wide Jinja2 environment (compiled templates and bytecode cache)
+        env = get_environment()
         
-        html_content = template.render(
+        context = dict(
             USER_NAME=username,
             current_date=current_date,
             counter=counter,
@@ -114,43 +196,18 @@ def create_email_content(counter, username, interests, city, country):
             weather_class=weather_class,
             city=city,
             country=country,
-            quote=quote,
-            history_fact=history_fact,
             news_by_topic=news_by_topic,
-            birthdays=birthdays,
-            deaths=deaths,
-            fun_fact=fun_fact,
-            gif_url=gif_url
+            **shared_content
         )
-        
-        # Read and concatenate all CSS files
-        css_files = [
-            'static/css/general.css',
-            'static/css/container.css',
-            'static/css/header.css',
-            'static/css/content.css',
-            'static/css/weather_widget.css',
-            'static/css/sections.css',
-            'static/css/gif_container.css',
-            'static/css/news_grid.css',
-            'static/css/historical_events.css',
-            'static/css/footer.css'
-        ]
-        css_content = ''
-        for css_file in css_files:
-            css_content += read_file(css_file) + '\n'
-        
-        # Remove <link> tags from the HTML content
-        html_content = html_content.replace('<link rel="stylesheet" href="static/css/email_style.css">', '')
 
-        # Inline the CSS using Premailer
-        premailer = Premailer(html=html_content, css_text=css_content)
-        final_html = premailer.transform()
-        
-        with io.open('data_files/email_preview.html', 'w', encoding='utf-8') as f:
-            f.write(final_html)
+        # Splice the per-recipient parts into the shared skeleton, inlined once per day
+        with profiled('render'):
+            inliner = get_inliner()
+            final_html = get_skeleton(env, inliner, shared_content).render(context)
+            if final_html is None:
+                final_html = render_full(env, inliner, context)
         
-        logging.info("Email content created with inlined CSS and saved for local viewing.")
+        logging.info("Email content created with inlined CSS.")
         return final_html
     except jinja2.exceptions.TemplateNotFound as e:
         logging.error(f"Template not found: {e}")
@@ -162,26 +219,81 @@ def create_email_content(counter, username, interests, city, country):
         raise
 
 if __name__ == "__main__":
+    pipeline_report = None
     try:
-        keys_df = load_keys()
-        email_recipients = get_email_recipients(keys_df)
+        if os.getenv('TEMPLATE_PRECOMPILE') == '1':
+            from utils.templating import precompile_templates
+            precompile_templates()
+        store = load_recipient_store()
+        journal = open_journal()
+
+        # Resume: count deliveries journaled before a crash, then skip everyone already delivered today
+        delivered = journal.delivered()
+        store.apply_deliveries(journal.day, delivered)
+        if delivered:
+            logging.info(f"Resuming: {len(delivered)} recipients already delivered today.")
+
+        # Recipients are streamed from the store twice: once to plan the fetches, once to send
+        with engine_from_env() as engine:
+            shared_content = fetch_shared_content(engine)
+            recipient_content = fetch_recipient_content(pending_recipients(store, delivered), engine)
         
-        for username, email, counter, interests, city, country in email_recipients:
-            subject = f"Day {counter}: Your Daily Dose of Motivation and Information 🌟"
-            html_content = create_email_content(counter, username, interests, city, country)
+        def record_result(result):
+            # Journal each delivery as soon as it completes, then derive the counter from it
+            if result.ok:
+                recipient = store.get(result.to_email)
+                journal.record(result.to_email, recipient['days'] + 1 if recipient else None)
+                store.apply_deliveries(journal.day, [result.to_email])
+                logging.info(f"Email sent to {result.to_email}")
+
+        bulk_sender = BulkSender(
+            workers=int(os.getenv('SEND_WORKERS', '1')),
+            rate=float(os.getenv('SEND_RATE', '0')) or None,
+            per_connection_rate=float(os.getenv('SEND_RATE_PER_CONNECTION', '0')) or None,
+            queue_size=int(os.getenv('SEND_QUEUE_SIZE', '100')),
+            on_result=record_result,
+        )
+        jobs = (
+            (f"Day {counter}: Your Daily Dose of Motivation and Information 🌟", email, (counter, username, interests, city, country))
+            for username, email, counter, interests, city, country in pending_recipients(store, delivered)
+        )
+        # Preview output is opt-in (PREVIEW_EVERY / PREVIEW_ARCHIVE), nothing is written by default
+        render_workers = int(os.getenv('RENDER_WORKERS', '0'))
+        if render_workers > 0:
+            # Load the CSS bundle and compile the inliner before the render processes are forked, so every
+            # worker inherits them instead of building its own
+            from utils.css_inliner import get_inliner
+            get_inliner()
+        preview_writer = open_preview_writer()
+        try:
+            # The pipeline starts the sender once the render processes are forked
+            pipeline_report = run_pipeline(
+                jobs,
+                create_email_content,
+                bulk_sender,
+                render_workers=render_workers,
+                render_context={'shared_content': shared_content, 'recipient_content': recipient_content},
+                on_rendered=preview_writer.add if preview_writer else None,
+            )
+        finally:
+            bulk_sender.close()
+            if preview_writer:
+                preview_writer.close()
 
-            send_email(subject, email, html_content)
-            update_recipient_counter(keys_df, email)
-            
-            logging.info(f"Email sent to {username} at {email}")
+        log_pipeline_report(pipeline_report)
 
-        # Save updated keys file
-        keys_df.to_excel('data_files/keys.xlsx', index=False)
+        # Export the updated counters for the Excel editing workflow
+        store.export_file(KEYS_FILE)
         logging.info("Keys file updated with new counters.")
+        journal.close()
 
     except Exception as e:
         logging.error(f"An error occurred: {e}")
         logging.error(traceback.format_exc())
         logging.info(f"Check the log file for more details: {log_filename}")
     finally:
+        log_connection_stats()
+        log_cache_stats()
+        log_stage_summary()
+        write_report(extra={'pipeline': pipeline_report, 'http': connection_stats(), 'cache': cache_stats()})
         logging.info("Script execution completed.")
\ No newline at end of file
@@ -0,0 +1,274 @@
+# utils/assets.py
+
+"""
+This script provides the static asset build: the email stylesheets under `static/css/` are concatenated in
+their declared cascade order, stripped of the rules no template can use, minified and written as a
+content-hashed bundle that the sender and the preview server keep in memory.
+
+Features:
+1. **Declared Order**: `CSS_FILES` is the single list of stylesheets and their cascade order.
+
+2. **Unused Rule Removal**: A selector is kept only if every tag, class and id it names appears in
+   `templates/`. Classes built at render time (e.g. `weather-widget__<description>` in `main.py`) are kept
+   through `DYNAMIC_CLASS_PREFIXES`. At-rules (`@import`, `@media`, ...) are kept as they are.
+
+3. **Content-Hashed Bundle**: `build_bundle()` writes `static/dist/email.<hash>.min.css` and a
+   `manifest.json` pointing to it, and removes the bundles of previous builds.
+
+4. **In-Memory Bundle**: `get_bundle()` returns the current bundle, rebuilding it when a stylesheet or a
+   template is newer than the manifest, and re-reading the CSS only when the content hash changes. With
+   `check=False` (the send path) a bundle already in memory is returned without looking at the files.
+
+Usage:
+- Run the build step with `python -m utils.assets`, or let `get_bundle()` build on first use.
+
+Example:
+```
+from utils.assets import get_bundle
+
+bundle = get_bundle()
+print(bundle.hash, len(bundle.css))
+```
+"""
+
+import os
+import re
+import json
+import glob
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import namedtuple
+
+# Stylesheets inlined into every email, in cascade order
+CSS_FILES = [
+    'static/css/general.css',
+    'static/css/container.css',
+    'static/css/header.css',
+    'static/css/content.css',
+    'static/css/weather_widget.css',
+    'static/css/sections.css',
+    'static/css/gif_container.css',
+    'static/css/news_grid.css',
+    'static/css/historical_events.css',
+    'static/css/footer.css',
+]
+
+TEMPLATE_FOLDER = 'templates'
+DIST_FOLDER = 'static/dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Classes that templates receive from code rather than spell out (see `weather_class` in main.py)
+DYNAMIC_CLASS_PREFIXES = ('weather-widget__',)
+
+Bundle = namedtuple('Bundle', ['hash', 'css', 'path'])
+
+_tag_regex = re.compile(r'<([a-zA-Z][\w-]*)')
+_attribute_regex = re.compile(r'\b(class|id)\s*=\s*"([^"]*)"')
+_jinja_expression_regex = re.compile(r'{{.*?}}|{%.*?%}')
+_combinator_regex = re.compile(r'\s*[\s>+~]\s*')
+_compound_part_regex = re.compile(r'([.#]?)([\w-]+)|\[[^\]]*\]|::?[\w-]+(\([^)]*\))?|\*')
+
+def template_identifiers(template_folder=TEMPLATE_FOLDER):
+    """
+    Return the sets of tag names, classes and ids written literally in the templates.
+    """
+    tags, classes, ids = {'html', 'head', 'body'}, set(), set()
+    for path in glob.glob(os.path.join(template_folder, '*.html')):
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        tags.update(tag.lower() for tag in _tag_regex.findall(source))
+        for attribute, value in _attribute_regex.findall(source):
+            names = _jinja_expression_regex.sub(' ', value).split()
+            (classes if attribute == 'class' else ids).update(names)
+    return tags, classes, ids
+
+def selector_is_used(selector_text, identifiers):
+    """
+    True if every tag, class and id named in the selector exists in the templates. Attribute selectors and
+    pseudo-classes are not checked, so the test only ever errs on the side of keeping a rule.
+    """
+    tags, classes, ids = identifiers
+    for compound in _combinator_regex.split(selector_text.strip()):
+        for match in _compound_part_regex.finditer(compound):
+            prefix, name = match.group(1), match.group(2)
+            if name is None or match.group(0).startswith(':'):
+                continue
+            if prefix == '.':
+                if name not in classes and not name.startswith(DYNAMIC_CLASS_PREFIXES):
+                    return False
+            elif prefix == '#':
+                if name not in ids:
+                    return False
+            elif name.lower() not in tags:
+                return False
+    return True
+
+def _minified_rule(rule):
+    # Built from the parsed rule rather than through a minifying serializer: cssutils serializes values
+    # through its process-wide serializer, which the inliner uses concurrently and must not be swapped
+    if rule.type == rule.STYLE_RULE:
+        declarations = ';'.join(
+            f"{prop.name}:{prop.value}{'!' + prop.priority if prop.priority else ''}"
+            for prop in rule.style.getProperties(all=True)
+        )
+        return f'{rule.selectorText}{{{declarations}}}' if declarations else ''
+    if rule.type == rule.MEDIA_RULE:
+        body = ''.join(_minified_rule(child) for child in rule.cssRules)
+        return f'@media {rule.media.mediaText}{{{body}}}' if body else ''
+    if rule.type == rule.COMMENT:
+        return ''
+    return rule.cssText
+
+def _minified_css(sheet):
+    return ''.join(_minified_rule(rule) for rule in sheet.cssRules)
+
+def _content_hash(css):
+    return hashlib.sha256(css.encode('utf-8')).hexdigest()[:16]
+
+def _write_atomic(path, text):
+    # A unique temporary file per writer, so processes building at the same time never share or truncate
+    # a file another one is reading; readers see either the old file or the complete new one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def build_bundle(css_files=None, template_folder=TEMPLATE_FOLDER, dist_folder=DIST_FOLDER):
+    """
+    Concatenate, prune and minify the stylesheets and write the content-hashed bundle.
+
+    Args:
+        css_files (Optional[list]): Stylesheets in cascade order, `CSS_FILES` by default.
+        template_folder (str): Folder scanned for the tags, classes and ids in use.
+        dist_folder (str): Output folder for the bundle and its manifest.
+
+    Returns:
+        dict: The manifest written (`hash`, `file`, `sources`, `bytes`, `source_bytes`, `rules_dropped`,
+            `selectors_dropped`).
+    """
+    import cssutils
+    # Suppress cssutils logging
+    cssutils.log.setLevel(logging.CRITICAL)
+    css_files = list(css_files or CSS_FILES)
+    source = ''
+    for css_file in css_files:
+        with open(css_file, 'r', encoding='utf-8') as f:
+            source += f.read() + '\n'
+
+    identifiers = template_identifiers(template_folder)
+    sheet = cssutils.parseString(source)
+    dropped = selectors_dropped = 0
+    for rule in list(sheet.cssRules):
+        if rule.type != rule.STYLE_RULE:
+            continue
+        used = [selector.selectorText for selector in rule.selectorList if selector_is_used(selector.selectorText, identifiers)]
+        if not used:
+            sheet.deleteRule(rule)
+            dropped += 1
+        elif len(used) < rule.selectorList.length:
+            selectors_dropped += rule.selectorList.length - len(used)
+            rule.selectorText = ', '.join(used)
+    css = _minified_css(sheet)
+
+    content_hash = _content_hash(css)
+    filename = f'email.{content_hash}.min.css'
+    os.makedirs(dist_folder, exist_ok=True)
+    _write_atomic(os.path.join(dist_folder, filename), css)
+    for stale in glob.glob(os.path.join(dist_folder, 'email.*.min.css')):
+        if os.path.basename(stale) != filename:
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                # Removed by another process building at the same time
+                pass
+
+    manifest = {
+        'hash': content_hash,
+        'file': filename,
+        'sources': css_files,
+        'bytes': len(css.encode('utf-8')),
+        'source_bytes': len(source.encode('utf-8')),
+        'rules_dropped': dropped,
+        'selectors_dropped': selectors_dropped,
+    }
+    # Write the manifest last and atomically, so readers never see it point to a missing bundle
+    manifest_path = os.path.join(dist_folder, MANIFEST_NAME)
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2))
+    logging.info(f"CSS bundle {filename} built: {manifest['source_bytes']} -> {manifest['bytes']} bytes, {dropped} unused rules and {selectors_dropped} unused selectors dropped.")
+    return manifest
+
+_bundle = None
+_bundle_key = None
+_bundle_lock = threading.Lock()
+
+def _newest_source_mtime(css_files, template_folder):
+    paths = list(css_files) + glob.glob(os.path.join(template_folder, '*.html'))
+    return max(os.path.getmtime(path) for path in paths)
+
+def _read_bundle(dist_folder, manifest):
+    """
+    Read the bundle named by `manifest`, or return None if it is missing or its content does not match the
+    manifest's hash (e.g. replaced by a concurrent build of changed sources).
+    """
+    try:
+        with open(os.path.join(dist_folder, manifest['file']), 'r', encoding='utf-8') as f:
+            css = f.read()
+    except FileNotFoundError:
+        return None
+    return css if _content_hash(css) == manifest['hash'] else None
+
+def get_bundle(css_files=None, template_folder=TEMPLATE_FOLDER, dist_folder=DIST_FOLDER, check=True):
+    """
+    Return the current `Bundle`, building it if the manifest is missing or older than a source, and reading
+    the bundle file only when its hash differs from the one already in memory.
+
+    Args:
+        check (bool): Compare the source and manifest mtimes even if a bundle is already in memory. The send
+            path passes False, so the sources are checked once per run rather than on every render.
+    """
+    global _bundle, _bundle_key
+    css_files = tuple(css_files or CSS_FILES)
+    manifest_path = os.path.join(dist_folder, MANIFEST_NAME)
+    with _bundle_lock:
+        if not check and _bundle is not None and _bundle_key[:3] == (css_files, template_folder, dist_folder):
+            return _bundle
+        newest_source = _newest_source_mtime(css_files, template_folder)
+        manifest_mtime = os.path.getmtime(manifest_path) if os.path.exists(manifest_path) else None
+        key = (css_files, template_folder, dist_folder, newest_source, manifest_mtime)
+        if _bundle is not None and _bundle_key == key:
+            return _bundle
+
+        manifest = None
+        if manifest_mtime is not None and manifest_mtime >= newest_source:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('sources') != list(css_files):
+                manifest = None
+        if manifest is None:
+            manifest = build_bundle(css_files, template_folder, dist_folder)
+            manifest_mtime = os.path.getmtime(manifest_path)
+
+        if _bundle is None or _bundle.hash != manifest['hash']:
+            css = _read_bundle(dist_folder, manifest)
+            if css is None:
+                logging.warning(f"CSS bundle {manifest['file']} is missing or does not match its hash, rebuilding it.")
+                manifest = build_bundle(css_files, template_folder, dist_folder)
+                manifest_mtime = os.path.getmtime(manifest_path)
+                css = _read_bundle(dist_folder, manifest)
+                if css is None:
+                    raise RuntimeError(f"CSS bundle {manifest['file']} was changed while it was being loaded.")
+            _bundle = Bundle(manifest['hash'], css, os.path.join(dist_folder, manifest['file']))
+            logging.info(f"CSS bundle {manifest['file']} loaded.")
+        _bundle_key = (css_files, template_folder, dist_folder, newest_source, manifest_mtime)
+        return _bundle
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    build_bundle()
@@ -0,0 +1,167 @@
+# utils/css_inliner.py
+
+"""
+This script provides a precompiled CSS inliner that produces exactly the same output as
+`Premailer(html=..., css_text=...).transform()` while doing the stylesheet work only once per run.
+
+Premailer re-parses the stylesheet, rebuilds its rule list, re-sorts it and re-parses every declaration
+block on every call. `CSSInliner` does all of that once in its constructor and keeps, for each rule, the
+compiled `CSSSelector` and the parsed declarations. Per document it only parses the HTML, runs the
+compiled selectors and merges the styles, using Premailer's own helpers so the output is byte-identical.
+
+Features:
+1. **One-Time Compilation**: `CSSInliner(css_text)` parses the CSS, computes Premailer's specificity order,
+   compiles the selectors and pre-parses the declarations and the leftover (non-inlinable) rules.
+
+2. **Per-Document Application**: `CSSInliner.transform(html)` applies the compiled rules to a document.
+   Documents that carry their own `<style>` or `<link rel="stylesheet">` tags fall back to Premailer.
+
+3. **Stylesheet Cache**: `get_inliner()` compiles the minified CSS bundle from `utils.assets` once and
+   reuses the compiled inliner until the bundle's content hash changes. The stylesheets and templates are
+   checked for changes once per run, not on every render.
+
+Usage:
+- Call `get_inliner()` and use `transform(html)` wherever `Premailer(html=..., css_text=...).transform()` was used.
+
+Example:
+```
+from utils.css_inliner import get_inliner
+
+final_html = get_inliner().transform(html_content)
+```
+"""
+
+import os
+import re
+import logging
+import threading
+import operator
+import cssutils
+from lxml import etree
+from lxml.cssselect import CSSSelector
+from premailer import Premailer
+from premailer.premailer import FILTER_PSEUDOSELECTORS, get_or_create_head
+from premailer.merge_style import csstext_to_pairs, merge_styles
+from utils.instrumentation import timed_stage
+from utils.assets import CSS_FILES, get_bundle
+
+# Suppress cssutils logging
+cssutils.log.setLevel(logging.CRITICAL)
+
+_own_stylesheet_regex = re.compile(r'<style|<link[^>]*stylesheet', re.I)
+
+class CSSInliner:
+    def __init__(self, css_text):
+        """
+        Args:
+            css_text (str): The stylesheet to inline, as it would be passed to `Premailer(css_text=...)`.
+        """
+        self.css_text = css_text
+        self._premailer = Premailer(css_text=css_text)
+        rules, leftover = self._premailer._parse_style_rules(css_text, 0)
+        rules.sort(key=operator.itemgetter(0))
+
+        # Same selector/pseudo-class split as Premailer.transform, done once
+        self.selectors = [selector for _, selector, _ in rules]
+        self._rules = []
+        for _, selector, style in rules:
+            new_selector = selector
+            class_ = ""
+            if ":" in selector:
+                new_selector, class_ = re.split(":", selector, 1)
+                class_ = ":%s" % class_
+            if class_ in FILTER_PSEUDOSELECTORS or class_.startswith(":nth-child"):
+                class_ = ""
+            else:
+                selector = new_selector
+            processed_style = csstext_to_pairs(style, validate=not self._premailer.disable_validation)
+            self._rules.append((CSSSelector(selector), processed_style, class_))
+
+        self._leftover_css = self._premailer._css_rules_to_string(leftover) if leftover else None
+
+    @timed_stage('render.inline')
+    def transform(self, html, pretty_print=True):
+        """
+        Inline the compiled stylesheet into `html` and return the resulting document.
+        """
+        if _own_stylesheet_regex.search(html):
+            return Premailer(html=html, css_text=self.css_text).transform(pretty_print=pretty_print)
+
+        premailer = self._premailer
+        stripped = html.strip()
+        tree = etree.fromstring(stripped, etree.HTMLParser()).getroottree()
+        page = tree.getroot()
+        root = tree if stripped.startswith(tree.docinfo.doctype) else page
+
+        head = get_or_create_head(tree)
+        if self._leftover_css:
+            style = etree.Element("style")
+            style.attrib["type"] = "text/css"
+            style.text = self._leftover_css
+            head.append(style)
+
+        elements = {}
+        for sel, processed_style, class_ in self._rules:
+            for item in sel(page):
+                item_id = id(item)
+                if item_id not in elements:
+                    elements[item_id] = {"item": item, "classes": [], "style": []}
+                elements[item_id]["style"].append(processed_style)
+                elements[item_id]["classes"].append(class_)
+
+        for element in elements.values():
+            final_style = merge_styles(
+                element["item"].attrib.get("style", ""),
+                element["style"],
+                element["classes"],
+                remove_unset_properties=premailer.remove_unset_properties,
+            )
+            if final_style:
+                element["item"].attrib["style"] = final_style
+            premailer._style_to_basic_html_attributes(element["item"], final_style, force=True)
+
+        if premailer.align_floating_images:
+            for item in page.xpath("//img[@style]"):
+                image_css = cssutils.parseStyle(item.attrib["style"])
+                if image_css.float == "right":
+                    item.attrib["align"] = "right"
+                elif image_css.float == "left":
+                    item.attrib["align"] = "left"
+
+        return etree.tostring(root, method="html", pretty_print=pretty_print, encoding="utf-8").decode("utf-8")
+
+_inliner = None
+_inliner_key = None
+_inliner_lock = threading.Lock()
+
+def read_stylesheet(css_files=None):
+    """
+    Read and concatenate the CSS files in cascade order.
+    """
+    css_content = ''
+    for css_file in css_files or CSS_FILES:
+        with open(css_file, 'r', encoding='utf-8') as f:
+            css_content += f.read() + '\n'
+    return css_content
+
+def get_inliner(css_files=None, check=False):
+    """
+    Return a compiled `CSSInliner`. By default it is built from the minified CSS bundle (`utils.assets`) and
+    recompiled only when the bundle's content hash changes; explicit `css_files` are read as they are and
+    recompiled when one of their mtimes changes.
+
+    The bundle's sources are only checked for changes on the first call, or on every call with `check=True`;
+    the preview server refreshes the bundle itself when it sees a change.
+    """
+    global _inliner, _inliner_key
+    if css_files is None:
+        bundle = get_bundle(check=check)
+        key, css_text = ('bundle', bundle.hash), bundle.css
+    else:
+        css_files = tuple(css_files)
+        key, css_text = tuple((css_file, os.path.getmtime(css_file)) for css_file in css_files), None
+    with _inliner_lock:
+        if _inliner is None or _inliner_key != key:
+            _inliner = CSSInliner(css_text if css_text is not None else read_stylesheet(css_files))
+            _inliner_key = key
+        return _inliner
@@ -0,0 +1,135 @@
+# utils/delivery_journal.py
+
+"""
+This script provides the append-only delivery journal that makes a run crash-safe and resumable. Every
+delivered email is written to the day's journal file as soon as the SMTP server accepts it, so a run that
+dies halfway knows on restart exactly who already received today's email.
+
+Features:
+1. **Append-Only Journal**: One JSON line per delivered recipient in `data_files/journal/YYYY-MM-DD.jsonl`
+   (directory configurable with `JOURNAL_DIR`, day taken in `TIMEZONE`), flushed and fsync'd before
+   `record()` returns.
+
+2. **Resume**: `delivered()` reads the day's journal back, so a restarted run skips everyone already
+   delivered. A line cut short by a crash is ignored.
+
+3. **Source of Truth for Counters**: The recipient store applies journal entries with
+   `RecipientStore.apply_deliveries`, which increments each counter at most once per day in a single
+   transaction, so replaying the journal after a crash never double counts.
+
+Usage:
+- Open today's journal with `open_journal()`, skip the emails in `delivered()` and call `record(email)`
+  for each successful send.
+
+Example:
+```
+from utils.delivery_journal import open_journal
+
+journal = open_journal()
+delivered = journal.delivered()
+store.apply_deliveries(journal.day, delivered)
+for username, email, counter, interests, city, country in store.recipients():
+    if email not in delivered:
+        ...
+        journal.record(email, counter)
+        store.apply_deliveries(journal.day, [email])
+```
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+import pytz
+
+def today(timezone=None):
+    """
+    Return today's date (ISO format) in `timezone` or `TIMEZONE`.
+    """
+    return datetime.now(pytz.timezone(timezone or os.getenv('TIMEZONE', 'UTC'))).date().isoformat()
+
+def _fsync_directory(directory):
+    # Make the new file's directory entry durable as well (not supported on Windows)
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+class DeliveryJournal:
+    def __init__(self, directory='data_files/journal', day=None):
+        """
+        Args:
+            directory (str): Directory holding one journal file per day.
+            day (Optional[str]): ISO date of the run; defaults to today in `TIMEZONE`.
+        """
+        self.day = day or today()
+        self.path = os.path.join(directory, f'{self.day}.jsonl')
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        created = not os.path.exists(self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if created:
+            _fsync_directory(directory)
+        elif not self._ends_with_newline():
+            # Terminate a line cut short by a crash so the next record starts on its own line
+            self._file.write('\n')
+            self._file.flush()
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def delivered(self):
+        """
+        Return the set of emails recorded as delivered today.
+        """
+        emails = set()
+        with self._lock, open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    emails.add(json.loads(line)['email'])
+                except (ValueError, KeyError):
+                    # Partial line from a crash mid-write
+                    continue
+        return emails
+
+    def record(self, email, counter=None):
+        """
+        Append one delivery and fsync it before returning.
+        """
+        line = json.dumps({'email': email, 'counter': counter, 'day': self.day, 'ts': time.time()})
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def open_journal(directory=None, day=None):
+    """
+    Open the journal for `day` (today by default) in `directory` or `JOURNAL_DIR`.
+    """
+    journal = DeliveryJournal(directory or os.getenv('JOURNAL_DIR', 'data_files/journal'), day)
+    logging.info(f"Delivery journal: {journal.path}")
+    return journal
@@ -0,0 +1,147 @@
+# utils/fetch_engine.py
+
+"""
+This script provides a thread-pool based fetch engine used to run the independent provider calls from
+`utils.utils` (GIF, quote, weather, news, history and fun fact) concurrently instead of one after the other.
+The wall time of a fetch round therefore approaches the slowest provider rather than the sum of all of them.
+
+Features:
+1. **Concurrent Execution**: Runs provider functions on a shared `ThreadPoolExecutor`.
+   - `FetchEngine.submit(host, func, *args)`: Schedules a single call and returns its future.
+   - `FetchEngine.run(tasks)`: Runs a dict of named calls and returns a dict of their results.
+
+2. **Per-Host Concurrency Limits**: Each call is tagged with the host it talks to and a semaphore per host
+   bounds how many calls hit that host at once. Limits come from `host_limits`, falling back to
+   `default_host_limit`.
+
+3. **Per-Call Timeout**: `FetchEngine.run` waits at most `timeout` seconds for each call and raises
+   `FetchTimeoutError` if a provider does not answer in time.
+
+4. **Unchanged Return Values**: Results and exceptions are passed through untouched, so callers get exactly
+   what the provider function returns (or raises) when called directly.
+
+5. **Environment Configuration**: `engine_from_env()` builds an engine from `FETCH_MAX_WORKERS`,
+   `FETCH_TIMEOUT` and `FETCH_HOST_LIMITS` (e.g. `news.google.com=2,api.openweathermap.org=4`).
+
+Usage:
+- Create an engine (or use `engine_from_env()`) and pass it a dict of `name: (host, func, args)` entries.
+
+Example:
+```
+from utils.fetch_engine import FetchEngine
+from utils.utils import get_gif, get_weather
+
+with FetchEngine(max_workers=8, host_limits={'api.openweathermap.org': 2}, timeout=10) as engine:
+    results = engine.run({
+        'gif_url': ('api.giphy.com', get_gif, ()),
+        'weather': ('api.openweathermap.org', get_weather, ('Toronto', 'CA')),
+    })
+```
+
+This example fetches the GIF and the weather at the same time and returns them keyed by name.
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+class FetchTimeoutError(TimeoutError):
+    """Raised when a provider call does not finish within the engine's per-call timeout."""
+
+def parse_host_limits(value):
+    """
+    Parse a `host=limit,host=limit` string into a dict of per-host concurrency limits.
+    """
+    host_limits = {}
+    for entry in (value or '').split(','):
+        if '=' not in entry:
+            continue
+        host, limit = entry.split('=', 1)
+        host_limits[host.strip()] = int(limit)
+    return host_limits
+
+class FetchEngine:
+    def __init__(self, max_workers=8, host_limits=None, default_host_limit=4, timeout=15):
+        """
+        Args:
+            max_workers (int): Size of the shared thread pool.
+            host_limits (Optional[dict]): Maximum concurrent calls per host.
+            default_host_limit (int): Limit for hosts missing from `host_limits`.
+            timeout (float): Seconds to wait for each call before raising `FetchTimeoutError`.
+        """
+        self.host_limits = dict(host_limits or {})
+        self.default_host_limit = default_host_limit
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch')
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                limit = self.host_limits.get(host, self.default_host_limit)
+                self._semaphores[host] = threading.BoundedSemaphore(limit)
+            return self._semaphores[host]
+
+    def _call(self, host, func, args, started):
+        with self._semaphore(host):
+            started.append(time.monotonic())
+            return func(*args)
+
+    def submit(self, host, func, *args):
+        """
+        Schedule `func(*args)` under the concurrency limit of `host` and return its future.
+        The future's `started` attribute holds the call's start time once it leaves the host queue.
+        """
+        started = []
+        future = self._executor.submit(self._call, host, func, args, started)
+        future.started = started
+        return future
+
+    def _result(self, name, future):
+        # The timeout counts from when the call starts, not from when it was queued behind its host limit
+        while True:
+            remaining = self.timeout - (time.monotonic() - future.started[0]) if future.started else self.timeout
+            try:
+                return future.result(timeout=max(remaining, 0))
+            except FutureTimeoutError:
+                if future.started and time.monotonic() - future.started[0] >= self.timeout:
+                    future.cancel()
+                    logging.error(f"Fetch '{name}' timed out after {self.timeout}s.")
+                    raise FetchTimeoutError(f"Fetch '{name}' timed out after {self.timeout}s")
+
+    def run(self, tasks):
+        """
+        Run a dict of named provider calls concurrently.
+
+        Args:
+            tasks (dict): Mapping of name to a `(host, func, args)` tuple.
+
+        Returns:
+            dict: Mapping of name to the value returned by the corresponding call.
+        """
+        futures = {name: self.submit(host, func, *args) for name, (host, func, args) in tasks.items()}
+        return {name: self._result(name, future) for name, future in futures.items()}
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=exc_type is None)
+        return False
+
+def engine_from_env():
+    """
+    Build a `FetchEngine` configured from the FETCH_* environment variables.
+    """
+    return FetchEngine(
+        max_workers=int(os.getenv('FETCH_MAX_WORKERS', '8')),
+        host_limits=parse_host_limits(os.getenv('FETCH_HOST_LIMITS')),
+        default_host_limit=int(os.getenv('FETCH_DEFAULT_HOST_LIMIT', '4')),
+        timeout=float(os.getenv('FETCH_TIMEOUT', '15')),
+    )
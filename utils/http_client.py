@@ -0,0 +1,132 @@
+# utils/http_client.py
+
+"""
+This script provides the shared HTTP client layer used by every provider in `utils.utils`. All requests go
+through one pooled `requests.Session`, so connections to the same host are kept alive and reused instead of
+paying a new TCP and TLS handshake for every call.
+
+Features:
+1. **Connection Pooling**: A single module-level session mounts an `HTTPAdapter` with a bounded pool per host,
+   sized from `HTTP_POOL_MAXSIZE` so it can serve the concurrent fetch engine.
+
+2. **Timeouts**: Every request gets a `(connect, read)` timeout from `HTTP_CONNECT_TIMEOUT` and
+   `HTTP_READ_TIMEOUT` unless the caller passes its own, so a stalled endpoint cannot hang the run.
+
+3. **Retries with Backoff**: Idempotent requests are retried up to `HTTP_RETRIES` times on connection errors,
+   5xx and 429 responses, with exponential backoff plus random jitter and respect for `Retry-After`.
+
+4. **Reuse Counters**: `connection_stats()` reports how many requests were served and how many of them reused
+   an existing connection; `log_connection_stats()` writes the summary to the log.
+
+Usage:
+- Call `http_get` wherever `requests.get` was used; it accepts the same arguments.
+
+Example:
+```
+from utils.http_client import http_get, log_connection_stats
+
+response = http_get("https://api.quotable.io/random")
+log_connection_stats()
+```
+"""
+
+import os
+import logging
+import threading
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+# Sessions inherited from a parent process, kept alive but unused (see `forget_session`)
+_inherited_sessions = []
+
+def default_timeout():
+    """
+    Return the `(connect, read)` timeout tuple configured through the environment.
+    """
+    return (float(os.getenv('HTTP_CONNECT_TIMEOUT', '5')), float(os.getenv('HTTP_READ_TIMEOUT', '15')))
+
+def create_session():
+    """
+    Create a `requests.Session` with keep-alive pooling and retry/backoff configured from the environment.
+    """
+    # requests/urllib3 are imported on first use so importing this module stays cheap
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    retry = Retry(
+        total=int(os.getenv('HTTP_RETRIES', '3')),
+        backoff_factor=float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5')),
+        backoff_jitter=float(os.getenv('HTTP_BACKOFF_JITTER', '0.5')),
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    pool_maxsize = int(os.getenv('HTTP_POOL_MAXSIZE', '16'))
+    adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_session():
+    """
+    Return the shared session, creating it on first use.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+def forget_session():
+    """
+    In a forked child process, stop using the session inherited from the parent so the child opens its own
+    connections. The inherited session is kept referenced rather than closed, since its sockets are shared
+    with the parent.
+    """
+    global _session, _session_lock
+    if _session is not None:
+        _inherited_sessions.append(_session)
+    _session = None
+    _session_lock = threading.Lock()
+
+def http_get(url, **kwargs):
+    """
+    Send a GET request through the shared session, applying the default timeout if none is given.
+
+    Args:
+        url (str): URL to fetch.
+        **kwargs: Extra arguments passed to `requests.Session.get`.
+
+    Returns:
+        requests.Response: The response of the last attempt.
+    """
+    kwargs.setdefault('timeout', default_timeout())
+    return get_session().get(url, **kwargs)
+
+def connection_stats():
+    """
+    Summarize connection reuse across all pools of the shared session.
+
+    Returns:
+        dict: Counts of 'requests', 'new_connections' and 'reused_connections'.
+    """
+    stats = {'requests': 0, 'new_connections': 0, 'reused_connections': 0}
+    if _session is None:
+        return stats
+    for adapter in set(_session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            stats['requests'] += pool.num_requests
+            stats['new_connections'] += pool.num_connections
+    stats['reused_connections'] = max(stats['requests'] - stats['new_connections'], 0)
+    return stats
+
+def log_connection_stats():
+    stats = connection_stats()
+    logging.info(f"HTTP pool: {stats['requests']} requests over {stats['new_connections']} connections "
+                 f"({stats['reused_connections']} reused).")
+    return stats
@@ -0,0 +1,255 @@
+# utils/instrumentation.py
+
+"""
+This script provides lightweight timing instrumentation for the hot paths of a run (provider calls, Jinja
+rendering, CSS inlining, the preview write and the SMTP send) and the per-run performance report.
+
+Features:
+1. **Timers**: `timed(stage)` is a context manager and `timed_stage(stage)` a decorator that record the
+   duration of a block or call under a stage name. Recording costs one `perf_counter` pair and a lock.
+
+2. **Per-Stage Aggregation**: Each stage keeps its count, total and maximum exactly, and a bounded reservoir
+   sample of durations (`SAMPLE_SIZE`) for the p50/p95 estimates, so memory stays constant on large runs.
+
+3. **Render Workers**: Samples recorded in render worker processes are returned with each rendered message
+   (`drain()`) and merged into the main process (`merge()`), so the report covers every process.
+
+4. **Slowest Render Profile**: With `PROFILE_SLOWEST_RENDER=1`, `profiled('render')` runs each render under
+   `cProfile` and keeps the profile of the slowest one, written next to the report as a `.prof` file
+   (open it with `python -m pstats` or snakeviz).
+
+5. **JSON Report**: `write_report()` writes `logs/perf_report_<timestamp>.json` with count, total, p50, p95
+   and max (in milliseconds) per stage, plus any extra sections such as the pipeline report.
+
+Usage:
+- Wrap hot-path code in `timed(...)` or decorate it with `timed_stage(...)`, and call `write_report()` at the
+  end of the run.
+
+Example:
+```
+from utils.instrumentation import timed, timed_stage, write_report
+
+@timed_stage('provider.get_quote')
+def get_quote():
+    ...
+
+with timed('preview_write'):
+    write_preview(html)
+
+write_report()
+```
+"""
+
+import os
+import json
+import math
+import time
+import random
+import logging
+import marshal
+import threading
+import functools
+from datetime import datetime
+from contextlib import contextmanager
+
+# Durations kept per stage for percentile estimates
+SAMPLE_SIZE = 10000
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of `values` (0 for an empty list).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Rank ceil(pct * n / 100), multiplied first so e.g. the p7 of 100 values is not pushed up by rounding
+    index = max(math.ceil(pct * len(ordered) / 100) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+class StageStats:
+    __slots__ = ('count', 'total', 'max', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = []
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        # Reservoir sampling keeps a uniform sample of at most SAMPLE_SIZE durations
+        if len(self.samples) < SAMPLE_SIZE:
+            self.samples.append(duration)
+        else:
+            index = random.randrange(self.count)
+            if index < SAMPLE_SIZE:
+                self.samples[index] = duration
+
+    def merge(self, count, total, maximum, samples):
+        self.count += count
+        self.total += total
+        self.max = max(self.max, maximum)
+        self.samples.extend(samples)
+        if len(self.samples) > SAMPLE_SIZE:
+            self.samples = random.sample(self.samples, SAMPLE_SIZE)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_ms': self.total * 1000,
+            'p50_ms': percentile(self.samples, 50) * 1000,
+            'p95_ms': percentile(self.samples, 95) * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+_stages = {}
+_slowest_profile = None
+_lock = threading.Lock()
+
+def record(stage, duration):
+    """
+    Record one duration (in seconds) for `stage`.
+    """
+    with _lock:
+        stats = _stages.get(stage)
+        if stats is None:
+            stats = _stages[stage] = StageStats()
+        stats.add(duration)
+
+@contextmanager
+def timed(stage):
+    """
+    Time the enclosed block under `stage`; the duration is recorded even if the block raises.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+def timed_stage(stage):
+    """
+    Decorator recording every call of the function under `stage`.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def profiling_enabled():
+    return os.getenv('PROFILE_SLOWEST_RENDER') == '1'
+
+@contextmanager
+def profiled(stage):
+    """
+    Like `timed(stage)`, but with `PROFILE_SLOWEST_RENDER=1` also profile the block with cProfile and keep
+    the profile if it is the slowest seen so far.
+    """
+    global _slowest_profile
+    if not profiling_enabled():
+        with timed(stage):
+            yield
+        return
+
+    import cProfile
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        duration = time.perf_counter() - start
+        record(stage, duration)
+        with _lock:
+            is_slowest = _slowest_profile is None or duration > _slowest_profile[0]
+        if is_slowest:
+            profile.create_stats()
+            with _lock:
+                _slowest_profile = (duration, stage, profile.stats)
+
+def drain():
+    """
+    Return and reset everything recorded in this process, in a picklable form for `merge()`.
+    """
+    global _stages, _slowest_profile
+    with _lock:
+        stages, slowest = _stages, _slowest_profile
+        _stages, _slowest_profile = {}, None
+    return {
+        'stages': {stage: (stats.count, stats.total, stats.max, stats.samples) for stage, stats in stages.items()},
+        'slowest_profile': slowest,
+    }
+
+def merge(drained):
+    """
+    Merge the output of `drain()` from another process into this one.
+    """
+    global _slowest_profile
+    with _lock:
+        for stage, values in drained['stages'].items():
+            stats = _stages.get(stage)
+            if stats is None:
+                stats = _stages[stage] = StageStats()
+            stats.merge(*values)
+        slowest = drained['slowest_profile']
+        if slowest and (_slowest_profile is None or slowest[0] > _slowest_profile[0]):
+            _slowest_profile = slowest
+
+def stage_summary(drained=None):
+    """
+    Return count, total, p50, p95 and max (in milliseconds) per stage, for this process or, if given, for the
+    output of `drain()`.
+    """
+    if drained is not None:
+        summaries = {}
+        for stage, values in sorted(drained['stages'].items()):
+            stats = StageStats()
+            stats.merge(*values)
+            summaries[stage] = stats.summary()
+        return summaries
+    with _lock:
+        return {stage: stats.summary() for stage, stats in sorted(_stages.items())}
+
+def log_stage_summary():
+    for stage, summary in stage_summary().items():
+        logging.info(f"{stage}: {summary['count']} calls, p50 {summary['p50_ms']:.1f} ms, "
+                     f"p95 {summary['p95_ms']:.1f} ms, max {summary['max_ms']:.1f} ms.")
+
+def write_report(log_folder='logs', extra=None):
+    """
+    Write the per-stage timings (and the slowest render profile, if any) to `log_folder`.
+
+    Args:
+        log_folder (str): Folder for the report, next to the log files.
+        extra (Optional[dict]): Additional sections to include, e.g. the pipeline report.
+
+    Returns:
+        str: Path of the JSON report.
+    """
+    os.makedirs(log_folder, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    report = {'generated_at': datetime.now().isoformat(timespec='seconds'), 'stages': stage_summary()}
+    report.update(extra or {})
+
+    with _lock:
+        slowest = _slowest_profile
+    if slowest:
+        duration, stage, stats = slowest
+        profile_path = os.path.join(log_folder, f'slowest_{stage}_{timestamp}.prof')
+        # Same format as cProfile's dump_stats, readable with pstats
+        with open(profile_path, 'wb') as f:
+            marshal.dump(stats, f)
+        report['slowest_profile'] = {'stage': stage, 'duration_ms': duration * 1000, 'path': profile_path}
+
+    report_path = os.path.join(log_folder, f'perf_report_{timestamp}.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, default=str)
+    logging.info(f"Performance report written to {report_path}")
+    return report_path
@@ -25,7 +25,15 @@ Features:
    making it easier to monitor logs in real-time.
 
 6. **Script Name Inclusion**: Uses a custom logging filter to dynamically include the script name in each
-   log message, making it clear which script generated each log entry.
+   log message, making it clear which script generated each log entry. The filter is attached to the handlers
+   and caches the basename per source file.
+
+7. **Queue Mode**: With `use_queue=True` (or `LOG_QUEUE=1`), the root logger only enqueues records and a
+   `QueueListener` thread formats and writes them, so logging in the hot loop does no disk or console I/O.
+   Call `stop_logging()` to flush (it also runs at exit). Forked worker processes log synchronously.
+
+8. **JSON Lines**: With `json_format=True` (or `LOG_JSON=1`), the log file is written as one JSON object per
+   record (`time`, `level`, `script`, `logger`, `thread`, `message`, `exc_info`) to `daily_email_<timestamp>.jsonl`.
 
 Usage:
 - Import the `setup_logging` function from this script.
@@ -44,16 +52,82 @@ and a custom log format that includes the log level and the message.
 """
 
 import os
+import json
+import queue
+import atexit
 import logging
 from datetime import datetime
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 
 class ScriptNameFilter(logging.Filter):
+    """
+    Adds `record.script_name`. The basename of each source file is computed once and cached.
+    """
+    def __init__(self):
+        super().__init__()
+        self._names = {}
+
     def filter(self, record):
-        record.script_name = os.path.basename(record.pathname)
+        name = self._names.get(record.pathname)
+        if name is None:
+            name = self._names[record.pathname] = os.path.basename(record.pathname)
+        record.script_name = name
         return True
 
-def setup_logging(log_folder="logs", log_level=logging.INFO, log_format='%(script_name)s - %(asctime)s %(message)s'):
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line.
+    """
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'script': getattr(record, 'script_name', None),
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that hands the record over as is, so message formatting also runs on the listener thread.
+    The listener lives in the same process, so the record does not need to be made picklable.
+    """
+    def prepare(self, record):
+        return record
+
+_listener = None
+
+def stop_logging():
+    """
+    Flush and stop the background log listener, if queue mode is active.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _log_synchronously_in_child():
+    # A forked child (e.g. a render worker) has no listener thread: log directly to the handlers instead
+    global _listener
+    if _listener is None:
+        return
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, QueueHandler):
+            root_logger.removeHandler(handler)
+    for handler in _listener.handlers:
+        root_logger.addHandler(handler)
+    _listener = None
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_log_synchronously_in_child)
+
+def setup_logging(log_folder="logs", log_level=logging.INFO, log_format='%(script_name)s - %(asctime)s %(message)s',
+                  use_queue=None, json_format=None):
     """
     Set up logging with log rotation and configurable log level and format.
 
@@ -61,37 +135,57 @@ def setup_logging(log_folder="logs", log_level=logging.INFO, log_format='%(scrip
         log_folder (str): Directory to store log files.
         log_level (int): Logging level (e.g., logging.INFO, logging.DEBUG).
         log_format (str): Log message format.
+        use_queue (Optional[bool]): Hand records to a background thread (`QueueHandler`/`QueueListener`)
+            instead of writing them synchronously; defaults to `LOG_QUEUE=1`.
+        json_format (Optional[bool]): Write the log file as JSON lines; defaults to `LOG_JSON=1`.
     
     Returns:
         str: The filename of the log file being used.
     """
+    if use_queue is None:
+        use_queue = os.getenv('LOG_QUEUE') == '1'
+    if json_format is None:
+        json_format = os.getenv('LOG_JSON') == '1'
+
     # Ensure log directory exists
     os.makedirs(log_folder, exist_ok=True)
     
     # Define log filename with formatted timestamp
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    log_filename = os.path.join(log_folder, f'daily_email_{timestamp}.log')
+    log_filename = os.path.join(log_folder, f'daily_email_{timestamp}.{"jsonl" if json_format else "log"}')
 
     # Set up log rotation handler
     file_handler = TimedRotatingFileHandler(log_filename, when='midnight', interval=1)
     file_handler.suffix = "%Y%m%d_%H%M%S"
-    file_handler.setFormatter(logging.Formatter(log_format))
+    file_handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(log_format))
+    stream_handler = logging.StreamHandler()
+
+    # The script name filter sits on the handlers, so records from every logger (not only the root) get it
+    script_name_filter = ScriptNameFilter()
+    handlers = [file_handler, stream_handler]
+    for handler in handlers:
+        handler.addFilter(script_name_filter)
 
     # Get the root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
 
     # Check if handlers already exist and clear them
+    stop_logging()
     if root_logger.hasHandlers():
         root_logger.handlers.clear()
 
     # Add handlers
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(logging.StreamHandler())
-
-    # Add the script name filter
-    script_name_filter = ScriptNameFilter()
-    root_logger.addFilter(script_name_filter)
+    if use_queue:
+        global _listener
+        log_queue = queue.SimpleQueue()
+        root_logger.addHandler(DeferredQueueHandler(log_queue))
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+    else:
+        for handler in handlers:
+            root_logger.addHandler(handler)
 
     logging.info("Logging initialized.")
-    return log_filename
\ No newline at end of file
+    return log_filename
@@ -0,0 +1,183 @@
+# utils/pipeline.py
+
+"""
+This script provides the render→send pipeline used by `main.py`. Instead of rendering, inlining and sending
+one recipient at a time, rendering of the next recipients overlaps with sending of the previous ones.
+
+Features:
+1. **Render Stage**: Renders each recipient's email (Jinja2 + Premailer) and builds its MIME message.
+   With `render_workers > 0` this runs in a `ProcessPoolExecutor`, so the CPU-heavy CSS inlining uses
+   several cores; with `render_workers = 0` it runs inline in the main process.
+
+2. **Shared Render Context**: Data that is the same for every job (e.g. the shared daily content and the
+   weather/news lookups) is sent to each worker process once through the pool initializer instead of
+   being pickled with every job.
+
+3. **Bounded Message Queue**: Rendered messages are handed to a `BulkSender`, whose bounded queue applies
+   backpressure to the render stage; at most `max_in_flight` renders are pending at any time.
+
+4. **Send Stage**: The `BulkSender` send workers deliver the messages over pooled SMTP connections. The
+   sender is started by `run_pipeline` once the render processes exist, so no process is forked while the
+   SMTP threads are running; forked workers drop the HTTP session and response cache inherited from the
+   main process and open their own on first use.
+
+5. **Per-Stage Metrics**: `run_pipeline` returns counts, busy time and throughput for the render stage,
+   the send report and the end-to-end throughput; `log_pipeline_report` writes them to the log. Timings
+   recorded by `utils/instrumentation.py` in render worker processes are merged into the main process.
+
+Usage:
+- Build a `BulkSender` without starting it, call `run_pipeline` with an iterable of
+  `(subject, to_email, render_args)` jobs, then close the sender.
+
+Example:
+```
+from utils.pipeline import run_pipeline, log_pipeline_report
+from utils.send_email import BulkSender
+
+jobs = [("Day 1", "a@example.com", (1, "Ann", "AI", "Toronto", "CA"))]
+sender = BulkSender(workers=4)
+try:
+    report = run_pipeline(jobs, create_email_content, sender, render_workers=4,
+                          render_context={'shared_content': shared_content})
+finally:
+    sender.close()
+log_pipeline_report(report)
+```
+"""
+
+import time
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from utils.send_email import build_message
+from utils import instrumentation
+from utils.http_client import forget_session
+from utils.response_cache import forget_cache
+
+_render = None
+_render_context = {}
+_in_worker_process = False
+
+def _init_render_worker(render, render_context, worker_process=False):
+    global _render, _render_context, _in_worker_process
+    _render = render
+    _render_context = render_context
+    _in_worker_process = worker_process
+    if worker_process:
+        # A forked worker starts with a copy of the parent's timings; drop them so merging counts each stage once
+        instrumentation.drain()
+        # Nor may it share the parent's SQLite connection and HTTP sockets
+        forget_cache()
+        forget_session()
+
+def _worker_ready():
+    return True
+
+def _render_message(subject, to_email, render_args):
+    start = time.perf_counter()
+    html = _render(*render_args, **_render_context)
+    msg = build_message(subject, to_email, html)
+    # Timings recorded in a worker process travel back with the message
+    timings = instrumentation.drain() if _in_worker_process else None
+    return to_email, msg, time.perf_counter() - start, timings
+
+def run_pipeline(jobs, render, sender, render_workers=0, render_context=None, max_in_flight=None, on_rendered=None):
+    """
+    Render and send every job, overlapping the render stage with the send stage.
+
+    Args:
+        jobs (Iterable[tuple]): `(subject, to_email, render_args)` per recipient.
+        render (Callable): Module-level function returning the HTML for `*render_args, **render_context`.
+        sender (BulkSender): Bulk sender that consumes the rendered messages. It is started here, after the
+            render processes, if it is not running yet; the caller closes it.
+        render_workers (int): Render processes; 0 renders inline in the calling process.
+        render_context (Optional[dict]): Keyword arguments shared by every render call.
+        max_in_flight (Optional[int]): Maximum renders pending at once (defaults to twice the workers).
+        on_rendered (Optional[Callable]): Called with `(to_email, msg)` for every rendered message, in the
+            calling process, e.g. `PreviewWriter.add`.
+
+    Returns:
+        dict: Per-stage metrics with 'render', 'send' and 'end_to_end' sections.
+    """
+    render_context = render_context or {}
+    max_in_flight = max_in_flight or max(render_workers * 2, 1)
+    stats = {'rendered': 0, 'failed': 0, 'busy': 0.0, 'handoff_wait': 0.0}
+    start = time.perf_counter()
+
+    def render_result(get_result, to_email):
+        try:
+            return get_result()
+        except Exception as e:
+            stats['failed'] += 1
+            logging.error(f"Render failed for {to_email}: {e}")
+            return None
+
+    def hand_off(rendered):
+        if rendered is None:
+            return
+        to_email, msg, render_time, timings = rendered
+        if timings:
+            instrumentation.merge(timings)
+        stats['rendered'] += 1
+        stats['busy'] += render_time
+        wait_start = time.perf_counter()
+        sender.submit_message(msg, to_email)
+        stats['handoff_wait'] += time.perf_counter() - wait_start
+        if on_rendered is not None:
+            try:
+                on_rendered(to_email, msg)
+            except Exception as e:
+                logging.error(f"Error in on_rendered for {to_email}: {e}")
+
+    if render_workers > 0:
+        with ProcessPoolExecutor(max_workers=render_workers, initializer=_init_render_worker,
+                                 initargs=(render, render_context, True)) as pool:
+            # Fork every render process before the SMTP threads start
+            for future in [pool.submit(_worker_ready) for _ in range(render_workers)]:
+                future.result()
+            sender.start()
+            pending = deque()
+            for subject, to_email, render_args in jobs:
+                if len(pending) >= max_in_flight:
+                    pending_email, future = pending.popleft()
+                    hand_off(render_result(future.result, pending_email))
+                pending.append((to_email, pool.submit(_render_message, subject, to_email, render_args)))
+            while pending:
+                pending_email, future = pending.popleft()
+                hand_off(render_result(future.result, pending_email))
+    else:
+        sender.start()
+        _init_render_worker(render, render_context)
+        for subject, to_email, render_args in jobs:
+            hand_off(render_result(lambda: _render_message(subject, to_email, render_args), to_email))
+    render_elapsed = time.perf_counter() - start
+
+    sender.join()
+    elapsed = time.perf_counter() - start
+    send_report = sender.report()
+    return {
+        'render': {
+            'workers': render_workers,
+            'rendered': stats['rendered'],
+            'failed': stats['failed'],
+            'busy_seconds': stats['busy'],
+            'elapsed': render_elapsed,
+            'per_sec': stats['rendered'] / render_elapsed if render_elapsed else 0.0,
+            'queue_wait_seconds': stats['handoff_wait'],
+        },
+        'send': send_report,
+        'end_to_end': {
+            'elapsed': elapsed,
+            'per_sec': send_report['sent'] / elapsed if elapsed else 0.0,
+        },
+    }
+
+def log_pipeline_report(report):
+    render, send, end_to_end = report['render'], report['send'], report['end_to_end']
+    logging.info(f"Render stage: {render['rendered']} rendered, {render['failed']} failed with {render['workers']} workers "
+                 f"({render['per_sec']:.1f}/sec, {render['busy_seconds']:.2f}s busy, "
+                 f"{render['queue_wait_seconds']:.2f}s blocked on the send queue).")
+    logging.info(f"Send stage: {send['sent']} sent, {send['failed']} failed ({send['msgs_per_sec']:.1f} msgs/sec, "
+                 f"p50 {send['p50_latency'] * 1000:.0f} ms, p95 {send['p95_latency'] * 1000:.0f} ms).")
+    logging.info(f"Pipeline: {end_to_end['per_sec']:.1f} recipients/sec end to end in {end_to_end['elapsed']:.2f}s.")
+    return report
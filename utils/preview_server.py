@@ -1,9 +1,183 @@
 # utils/preview_server.py
 
-from flask import Flask, render_template, send_from_directory, redirect, url_for
+"""
+This script provides the template preview server used while designing the email. Each template under
+`templates/` is rendered with example data and the CSS bundle, and open previews reload in the browser as
+soon as one of their files changes.
+
+Features:
+1. **Render Cache**: Rendered previews are kept in memory, keyed on the template and its data, so repeated
+   and parallel requests neither read the disk nor re-render. The template list is cached the same way.
+
+2. **File Watcher**: A background thread polls `templates/` and `static/css/` every `PREVIEW_POLL_INTERVAL`
+   seconds. A changed template evicts only the previews that include it; a previewed render is also evicted
+   when the CSS bundle it was rendered with is rebuilt with a different content hash.
+
+3. **Live Reload**: Every preview listens on `/events` (server-sent events) and reloads itself when the
+   watcher reports that it changed, so only the affected previews are re-rendered.
+
+4. **Production Render**: `/render/<recipient>` returns the real email from `main.create_email_content`
+   (skeleton, CSS inliner and all) for an address in the recipient store or a synthetic `fixture-<n>`.
+   Provider data comes from `benchmarks/fixtures.py` (`?source=fixture`, the default, set by
+   `PREVIEW_DATA_SOURCE`) or from the real providers through the response cache (`?source=cache`).
+
+5. **Render Benchmark**: `/bench?recipients=N` renders N fixture recipients the same way and returns the
+   wall time and the per-stage timings (`render`, `render.jinja`, `render.inline`, ...) as JSON.
+
+Usage:
+- Run `python -m utils.preview_server` from the repository root and open http://127.0.0.1:5000/,
+  http://127.0.0.1:5000/render/fixture-0 or http://127.0.0.1:5000/bench?recipients=500.
+"""
+
+from flask import Flask, Response, render_template, send_from_directory, redirect, url_for, request, jsonify, abort
 import os
+import glob
+import json
+import time
+import queue
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from jinja2 import meta
+from utils.assets import get_bundle
+from utils.templating import discard_environment
 
 app = Flask(__name__, template_folder='../templates')
+# Evicted previews must be rendered from the changed template, not Jinja's in-memory copy
+app.config['TEMPLATES_AUTO_RELOAD'] = True
+
+TEMPLATE_FOLDER = 'templates'
+CSS_FOLDER = 'static/css'
+
+# Seconds between two scans of the watched folders
+POLL_INTERVAL = float(os.getenv('PREVIEW_POLL_INTERVAL', '0.5'))
+
+# Seconds between keep-alive comments on idle event streams
+KEEPALIVE_INTERVAL = 15
+
+# Example data passed to every previewed template
+PREVIEW_DATA = {
+    'quote': "Believe you can and you're halfway there.",
+    'weather': "Sunny, 25°C",
+    'historical_event': "On this day in 1969, Apollo 11 landed on the moon.",
+    'news': "Latest news headlines...",
+}
+
+# Reloads the page when the server reports that this preview changed
+LIVE_RELOAD_SCRIPT = '''
+        <script>
+            new EventSource("{events_url}").addEventListener("change", function (event) {{
+                if (JSON.parse(event.data).previews.indexOf("{template}") !== -1) {{
+                    window.location.reload();
+                }}
+            }});
+        </script>
+'''
+
+# (template, data key) -> (rendered HTML, templates it depends on, CSS bundle hash)
+_renders = {}
+_template_list = None
+# Bumped by every invalidation, so a render that raced with one is not cached
+_generation = 0
+_cache_lock = threading.Lock()
+
+_subscribers = set()
+_subscribers_lock = threading.Lock()
+_watcher = None
+_watcher_lock = threading.Lock()
+
+def _data_key(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def template_dependencies(template_name):
+    """
+    Return `template_name` and every template it includes, extends or imports, recursively.
+    """
+    env = app.jinja_env
+    dependencies, pending = set(), [template_name]
+    while pending:
+        name = pending.pop()
+        if name in dependencies:
+            continue
+        dependencies.add(name)
+        source = env.loader.get_source(env, name)[0]
+        # Dynamic references (e.g. include of a variable) are reported as None and cannot be tracked
+        pending.extend(reference for reference in meta.find_referenced_templates(env.parse(source)) if reference)
+    return dependencies
+
+def _snapshot():
+    """
+    Modification time of every watched file.
+    """
+    paths = glob.glob(os.path.join(TEMPLATE_FOLDER, '*.html')) + glob.glob(os.path.join(CSS_FOLDER, '*.css'))
+    snapshot = {}
+    for path in paths:
+        try:
+            snapshot[path] = os.path.getmtime(path)
+        except OSError:
+            # Deleted between the listing and the stat
+            pass
+    return snapshot
+
+def invalidate(changed_paths):
+    """
+    Evict the cached previews affected by `changed_paths` and return their names.
+    """
+    global _template_list, _generation
+    changed_templates = {os.path.basename(path) for path in changed_paths if path.endswith('.html')}
+    # Templates feed the unused-rule pruning too, so any change may rebuild the bundle
+    bundle_hash = get_bundle().hash
+    if changed_templates:
+        # /render and /bench use the send-path environment, which does not reload templates by itself;
+        # a new environment also rebuilds the email skeleton
+        discard_environment()
+    with _cache_lock:
+        _generation += 1
+        if changed_templates:
+            _template_list = None
+        evicted = [key for key, (_, dependencies, rendered_hash) in _renders.items()
+                   if dependencies & changed_templates or rendered_hash != bundle_hash]
+        for key in evicted:
+            del _renders[key]
+    return sorted({template for template, _ in evicted})
+
+def publish(previews):
+    """
+    Send a `change` event listing `previews` to every connected browser.
+    """
+    with _subscribers_lock:
+        for subscriber in _subscribers:
+            subscriber.put(previews)
+
+def _watch():
+    previous = _snapshot()
+    while True:
+        time.sleep(POLL_INTERVAL)
+        current = _snapshot()
+        changed = {path for path in previous.keys() | current.keys() if previous.get(path) != current.get(path)}
+        previous = current
+        if not changed:
+            continue
+        try:
+            previews = invalidate(changed)
+        except Exception as e:
+            # Keep watching, e.g. while a half-saved stylesheet fails to build
+            logging.error(f"Error while invalidating previews for {sorted(changed)}: {e}")
+            continue
+        logging.info(f"Changed: {', '.join(sorted(changed))}; reloading previews: {', '.join(previews) or 'none'}.")
+        if previews:
+            publish(previews)
+
+def start_watcher():
+    """
+    Start the file watcher thread once per process.
+    """
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch, name='preview-watcher', daemon=True)
+            _watcher.start()
 
 # Serve static CSS files
 @app.route('/static/css/<path:filename>')
@@ -13,40 +187,35 @@ def serve_css(filename):
 # List all available templates
 @app.route('/')
 def index():
-    template_dir = os.path.join(app.root_path, '../templates')
-    templates = [f for f in os.listdir(template_dir) if f.endswith('.html')]
+    global _template_list
+    start_watcher()
+    with _cache_lock:
+        templates, generation = _template_list, _generation
+    if templates is None:
+        template_dir = os.path.join(app.root_path, '../templates')
+        templates = sorted(f for f in os.listdir(template_dir) if f.endswith('.html'))
+        with _cache_lock:
+            if generation == _generation:
+                _template_list = templates
     return render_template('index.html', templates=templates)
 
 # Serve the email templates with example data and CSS
 @app.route('/preview/<template>')
 def preview(template):
-    data = {
-        'quote': "Believe you can and you're halfway there.",
-        'weather': "Sunny, 25°C",
-        'historical_event': "On this day in 1969, Apollo 11 landed on the moon.",
-        'news': "Latest news headlines...",
-    }
-    
-    # Read and concatenate all CSS files
-    css_files = [
-        'static/css/general.css',
-        'static/css/container.css',
-        'static/css/header.css',
-        'static/css/content.css',
-        'static/css/weather_widget.css',
-        'static/css/sections.css',
-        'static/css/gif_container.css',
-        'static/css/news_grid.css',
-        'static/css/historical_events.css',
-        'static/css/footer.css',
-    ]
-    css_content = ''
-    for css_file in css_files:
-        with open(css_file, 'r') as f:
-            css_content += f.read() + '\n'
-    
+    start_watcher()
+    key = (template, _data_key(PREVIEW_DATA))
+    with _cache_lock:
+        cached, generation = _renders.get(key), _generation
+    if cached is not None:
+        return cached[0]
+
+    # Minified CSS bundle, kept in memory and reloaded when its content hash changes
+    bundle = get_bundle()
+    css_content = bundle.css
+    live_reload = LIVE_RELOAD_SCRIPT.format(events_url=url_for('events'), template=template)
+
     # Render the component template within a complete HTML document
-    return f'''
+    html = f'''
         <!DOCTYPE html>
         <html lang="en">
             <head>
@@ -59,11 +228,173 @@ def preview(template):
             </head>
             <body>
                 <div class="container">
-                    {render_template(f'{template}.html', **data)}
+                    {render_template(f'{template}.html', **PREVIEW_DATA)}
                 </div>
+                {live_reload}
             </body>
         </html>
     '''
+    dependencies = template_dependencies(f'{template}.html')
+    with _cache_lock:
+        if generation == _generation:
+            _renders[key] = (html, dependencies, bundle.hash)
+    return html
+
+# Server-sent events announcing which previews changed
+@app.route('/events')
+def events():
+    start_watcher()
+    subscriber = queue.Queue()
+    with _subscribers_lock:
+        _subscribers.add(subscriber)
+
+    def stream():
+        try:
+            # Sent right away so the response starts, and tells the browser how soon to reconnect
+            yield 'retry: 1000\n\n'
+            while True:
+                try:
+                    previews = subscriber.get(timeout=KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    # Also detects closed connections, the write fails and the generator is closed
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: change\ndata: {json.dumps({'previews': previews})}\n\n"
+        finally:
+            with _subscribers_lock:
+                _subscribers.discard(subscriber)
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+# Provider data for /render and /bench: 'fixture' never touches the network
+DATA_SOURCE = os.getenv('PREVIEW_DATA_SOURCE', 'fixture')
+DATA_SOURCES = ('fixture', 'cache')
+
+# Upper bound on the recipients rendered by one /bench request
+BENCH_MAX_RECIPIENTS = 5000
+
+# (source, day) -> shared content, fetched once per day when the source is 'cache'
+_shared_content = {}
+_shared_content_lock = threading.Lock()
+# One /bench at a time, the stage timings are process-wide
+_bench_lock = threading.Lock()
+
+def _main():
+    """
+    Import `main` on first use; it sets up logging and loads `.env` like a real run.
+    """
+    import main
+    return main
+
+def _fixture_index(value):
+    return int(hashlib.sha256(str(value).encode('utf-8')).hexdigest(), 16)
+
+def fixture_recipient(index):
+    """
+    Synthetic recipient tuple, in the `RecipientStore.recipients` layout, for `fixture-<index>`.
+    """
+    from benchmarks.fixtures import TOPICS
+    interests = f'{TOPICS[index % len(TOPICS)]}, {TOPICS[(index + 2) % len(TOPICS)]}'
+    return (f'Recipient {index}', f'fixture-{index}', index + 1, interests, 'Toronto', 'CA')
+
+def find_recipient(recipient):
+    """
+    Return the recipient tuple for `fixture-<n>` or for an email address in the recipient store, or None.
+    Aborts with 422 if the store holds the recipient with an invalid counter cell.
+    """
+    if recipient.startswith('fixture-') and recipient[len('fixture-'):].isdigit():
+        return fixture_recipient(int(recipient[len('fixture-'):]))
+    from utils.recipient_store import open_store
+    store = open_store()
+    try:
+        row = store.get(recipient)
+    finally:
+        store.close()
+    if row is None:
+        return None
+    if not isinstance(row['days'], int):
+        # Held back by the store until the cell is fixed, as `RecipientStore.recipients()` does
+        abort(422, f"Recipient '{recipient}' has 'Days Receiving the email' = {row['days']!r}, not a whole number; "
+                   f"fix the cell in the recipient file.")
+    return (row['nickname'], row['email'], row['days'] + 1, row['interests'], row['city'], row['country'])
+
+def provider_content(recipients, source):
+    """
+    Return `(shared_content, recipient_content)` for `recipients`, as `main` fetches them before rendering.
+
+    With `source='fixture'` the data comes from `benchmarks/fixtures.py`, varied per city and topic. With
+    `source='cache'` the real providers are called through the persistent response cache; the shared content
+    is then kept in memory for the rest of the day.
+    """
+    from utils.utils import split_interests, normalize_topic
+    main = _main()
+    if source == 'fixture':
+        from benchmarks.fixtures import SHARED_CONTENT, WEATHER_SAMPLES, sample_articles
+        recipient_content = {'weather': {}, 'news': {}}
+        for _, _, _, interests, city, country in recipients:
+            recipient_content['weather'][(city, country)] = WEATHER_SAMPLES[_fixture_index((city, country)) % len(WEATHER_SAMPLES)]
+            for topic in split_interests(interests):
+                recipient_content['news'][normalize_topic(topic)] = sample_articles(topic)
+        return dict(SHARED_CONTENT), recipient_content
+
+    key = (source, datetime.now().date())
+    with _shared_content_lock:
+        shared_content = _shared_content.get(key)
+        if shared_content is None:
+            shared_content = _shared_content[key] = main.fetch_shared_content()
+    return shared_content, main.fetch_recipient_content(recipients)
+
+def _requested_source():
+    source = request.args.get('source', DATA_SOURCE)
+    if source not in DATA_SOURCES:
+        abort(400, f"Unknown source '{source}', expected one of {', '.join(DATA_SOURCES)}.")
+    return source
+
+# Render the real, CSS-inlined email of one recipient
+@app.route('/render/<recipient>')
+def render_recipient(recipient):
+    start_watcher()
+    source = _requested_source()
+    found = find_recipient(recipient)
+    if found is None:
+        abort(404, f"No recipient '{recipient}' in the recipient store (use fixture-<n> for synthetic ones).")
+    nickname, _, counter, interests, city, country = found
+    shared_content, recipient_content = provider_content([found], source)
+    return _main().create_email_content(counter, nickname, interests, city, country, shared_content, recipient_content)
+
+# Render many fixture recipients through the production path and report per-stage timings
+@app.route('/bench')
+def bench():
+    from utils import instrumentation
+    start_watcher()
+    source = _requested_source()
+    count = min(request.args.get('recipients', 100, type=int), BENCH_MAX_RECIPIENTS)
+    if count < 0:
+        abort(400, f"recipients must be between 0 and {BENCH_MAX_RECIPIENTS}.")
+    recipients = [fixture_recipient(index) for index in range(count)]
+    shared_content, recipient_content = provider_content(recipients, source)
+    create_email_content = _main().create_email_content
+
+    with _bench_lock:
+        # Keep whatever was recorded before so it is not mixed into this run
+        previous = instrumentation.drain()
+        start = time.perf_counter()
+        total_bytes = 0
+        for nickname, _, counter, interests, city, country in recipients:
+            total_bytes += len(create_email_content(counter, nickname, interests, city, country, shared_content, recipient_content))
+        elapsed = time.perf_counter() - start
+        recorded = instrumentation.drain()
+        instrumentation.merge(previous)
+
+    return jsonify({
+        'recipients': count,
+        'source': source,
+        'wall_ms': elapsed * 1000,
+        'per_recipient_ms': elapsed * 1000 / count if count else 0.0,
+        'recipients_per_sec': count / elapsed if elapsed else 0.0,
+        'average_bytes': total_bytes / count if count else 0,
+        'stages': instrumentation.stage_summary(recorded),
+    })
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True, threaded=True)
@@ -0,0 +1,148 @@
+# utils/preview_writer.py
+
+"""
+This script provides the opt-in preview output of a run. Rendering no longer writes
+`data_files/email_preview.html` for every recipient; instead the pipeline hands each rendered message to a
+`PreviewWriter`, which by default is not created at all, so the send path does no preview writes.
+
+Features:
+1. **Sampling**: With `PREVIEW_EVERY=N`, every Nth rendered email (the 1st, the N+1th, ...) is written to
+   `data_files/email_preview.html`, atomically, so the file always holds one complete email.
+
+2. **Per-Run Archive**: With `PREVIEW_ARCHIVE=1`, every rendered email is added to a compressed
+   `data_files/previews/previews_<timestamp>.zip` (one `<n>_<recipient>.html` entry each) by a background
+   writer thread, so compression and disk I/O stay off the render loop. The archive folder is configurable
+   with `PREVIEW_DIR`.
+
+3. **Worker Friendly**: Messages are collected in the main process when the pipeline hands them to the
+   sender, so previews work the same with `RENDER_WORKERS` > 0.
+
+Usage:
+- Call `open_preview_writer()` once per run, pass its `add` method to `run_pipeline(on_rendered=...)` and
+  call `close()` at the end of the run.
+
+Example:
+```
+from utils.preview_writer import open_preview_writer
+
+preview_writer = open_preview_writer()
+run_pipeline(jobs, render, sender, on_rendered=preview_writer.add if preview_writer else None)
+if preview_writer:
+    preview_writer.close()
+```
+"""
+
+import os
+import re
+import queue
+import logging
+import threading
+from datetime import datetime
+from utils.instrumentation import timed
+
+PREVIEW_FILE = 'data_files/email_preview.html'
+
+_unsafe_filename_regex = re.compile(r'[^\w.@+-]+')
+
+def message_html(msg):
+    """
+    Return the HTML body of a message built by `utils.send_email.build_message`.
+    """
+    for part in msg.walk():
+        if part.get_content_type() == 'text/html':
+            return part.get_payload(decode=True).decode(part.get_content_charset() or 'utf-8')
+    return ''
+
+class PreviewWriter:
+    def __init__(self, every=0, archive_dir=None, path=PREVIEW_FILE, queue_size=1000):
+        """
+        Args:
+            every (int): Write every Nth rendered email to `path`; 0 disables sampling.
+            archive_dir (Optional[str]): Folder of the per-run zip archive; None disables the archive.
+            path (str): File receiving the sampled emails.
+            queue_size (int): Messages waiting for the archive thread before `add` blocks.
+        """
+        self.every = every
+        self.path = path
+        self.rendered = 0
+        self.sampled = 0
+        self.archived = 0
+        self.archive_path = None
+        self._queue = None
+        self._thread = None
+        if archive_dir:
+            os.makedirs(archive_dir, exist_ok=True)
+            self.archive_path = os.path.join(archive_dir, f"previews_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip")
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._thread = threading.Thread(target=self._write_archive, name='preview-archive', daemon=True)
+            self._thread.start()
+
+    def add(self, to_email, msg):
+        """
+        Record one rendered message; called by the pipeline for every recipient.
+        """
+        self.rendered += 1
+        if self.every and (self.rendered - 1) % self.every == 0:
+            self._write_sample(message_html(msg))
+        if self._queue is not None:
+            self._queue.put((self.rendered, to_email, msg))
+
+    def _write_sample(self, html):
+        with timed('preview_write'):
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+                f.write(html)
+            os.replace(self.path + '.tmp', self.path)
+        self.sampled += 1
+
+    def _write_archive(self):
+        # zipfile pulls in bz2 and lzma, so it is only imported when an archive is requested
+        import zipfile
+        try:
+            archive = zipfile.ZipFile(self.archive_path, 'w', compression=zipfile.ZIP_DEFLATED)
+        except OSError as e:
+            logging.error(f"Error while creating the preview archive {self.archive_path}: {e}")
+            archive = None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                if archive is None:
+                    # Keep draining the queue so the pipeline never blocks on a failed archive
+                    continue
+                index, to_email, msg = item
+                try:
+                    with timed('preview_write'):
+                        archive.writestr(f"{index:06d}_{_unsafe_filename_regex.sub('_', to_email)}.html", message_html(msg))
+                    self.archived += 1
+                except Exception as e:
+                    logging.error(f"Error while archiving the preview for {to_email}: {e}")
+        finally:
+            if archive is not None:
+                archive.close()
+
+    def close(self):
+        """
+        Wait for the archive thread to write every queued message and close the archive.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            logging.info(f"{self.archived} email previews archived to {self.archive_path}.")
+        if self.sampled:
+            logging.info(f"{self.sampled} of {self.rendered} emails written to {self.path} (every {self.every}).")
+
+def open_preview_writer():
+    """
+    Return the `PreviewWriter` configured by `PREVIEW_EVERY` and `PREVIEW_ARCHIVE`, or None when both are off
+    (the default).
+    """
+    every = int(os.getenv('PREVIEW_EVERY', '0'))
+    archive = os.getenv('PREVIEW_ARCHIVE') == '1'
+    if not every and not archive:
+        return None
+    return PreviewWriter(every=every, archive_dir=os.getenv('PREVIEW_DIR', 'data_files/previews') if archive else None)
@@ -0,0 +1,134 @@
+# utils/recipient_source.py
+
+"""
+This script provides streaming readers and writers for recipient lists. Rows are read lazily, a chunk at a
+time, so memory stays flat however many recipients a list holds; nothing is materialized as a DataFrame.
+
+Features:
+1. **Formats**: CSV (`csv.DictReader`), JSON Lines (one object per line) and Excel `.xlsx` (openpyxl in
+   read-only mode), chosen by file extension.
+
+2. **Chunked Iteration**: `iter_row_chunks(path, chunk_size)` yields lists of up to `chunk_size` rows, each a
+   dict keyed by spreadsheet column (`Nickname`, `Email`, ...); `iter_rows(path)` yields them one by one.
+
+3. **Streaming Export**: `write_rows(path, rows, columns)` writes rows back in the same format, using
+   openpyxl's write-only mode for `.xlsx`.
+
+Usage:
+- Pass the recipient file to `iter_rows` or `iter_row_chunks`; the recipient store imports through them.
+
+Example:
+```
+from utils.recipient_source import read_columns, iter_row_chunks
+
+columns = read_columns('data_files/keys.xlsx')
+for chunk in iter_row_chunks('data_files/keys.xlsx', chunk_size=5000):
+    for row in chunk:
+        print(row['Email'])
+```
+"""
+
+import os
+import csv
+import json
+from itertools import islice
+
+SUPPORTED_EXTENSIONS = ('.csv', '.jsonl', '.xlsx')
+
+def _extension(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Unsupported recipient file {path}; expected one of {', '.join(SUPPORTED_EXTENSIONS)}")
+    return extension
+
+def _iter_csv(path):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            yield {column: (value if value != '' else None) for column, value in row.items()}
+
+def _iter_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def _iter_xlsx(path):
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        for values in rows:
+            if any(value is not None for value in values):
+                yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+def read_columns(path):
+    """
+    Return the column names of a recipient file in their original order.
+    """
+    extension = _extension(path)
+    if extension == '.csv':
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            return next(csv.reader(f), [])
+    if extension == '.xlsx':
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            header = next(workbook.active.iter_rows(values_only=True), ())
+            return [column for column in header if column is not None]
+        finally:
+            workbook.close()
+    # JSON Lines has no header: collect the keys in first-seen order
+    columns = {}
+    for row in _iter_jsonl(path):
+        columns.update(dict.fromkeys(row))
+    return list(columns)
+
+def iter_rows(path):
+    """
+    Lazily yield each row of a CSV, JSONL or .xlsx recipient file as a dict keyed by column.
+    """
+    extension = _extension(path)
+    if extension == '.csv':
+        return _iter_csv(path)
+    if extension == '.jsonl':
+        return _iter_jsonl(path)
+    return _iter_xlsx(path)
+
+def iter_row_chunks(path, chunk_size=1000):
+    """
+    Lazily yield lists of up to `chunk_size` rows from a recipient file.
+    """
+    rows = iter_rows(path)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def write_rows(path, rows, columns):
+    """
+    Stream `rows` (dicts keyed by column) to a CSV, JSONL or .xlsx file with the given column order.
+    """
+    extension = _extension(path)
+    if extension == '.csv':
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+    elif extension == '.jsonl':
+        with open(path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps({column: row.get(column) for column in columns}, default=str) + '\n')
+    else:
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(list(columns))
+        for row in rows:
+            sheet.append([row.get(column) for column in columns])
+        workbook.save(path)
@@ -0,0 +1,351 @@
+# utils/recipient_store.py
+
+"""
+This script provides the SQLite-backed recipient store. Recipients are kept in an indexed local database
+instead of being read from `data_files/keys.xlsx` with pandas on every run, scanned with a boolean mask per
+counter update and rewritten as a whole workbook at the end.
+
+Features:
+1. **Indexed Store**: Recipients live in `data_files/recipients.sqlite` (configurable with `RECIPIENT_STORE`)
+   with the email address as primary key, so lookups and counter updates are O(log n).
+
+2. **Incremental Counter Updates**: `increment_counter(email)` updates one row and commits immediately, so
+   progress is kept even if the run stops halfway. `apply_deliveries(day, emails)` derives the counters from
+   the delivery journal (`utils/delivery_journal.py`), counting each recipient at most once per day.
+
+3. **Excel Import/Export**: `keys.xlsx` remains the editing format (CSV and JSONL files work too).
+   `sync_from_file()` imports the file when it changed since the last import or export, and `export_file()`
+   writes the store back with the same columns (including any extra columns) in the same order. Both stream
+   through `utils/recipient_source.py`, so neither side holds the whole list in memory.
+
+4. **Streaming Reads**: `recipients()` lazily yields the same tuples as `utils.utils.get_email_recipients`
+   `(username, email, counter, interests, city, country)`, fetched from SQLite a chunk at a time.
+
+Usage:
+- Open the store with `open_store()`, sync it from `keys.xlsx`, iterate `recipients()` and call `increment_counter`.
+
+Example:
+```
+from utils.recipient_store import open_store
+
+store = open_store()
+store.sync_from_file('data_files/keys.xlsx')
+for username, email, counter, interests, city, country in store.recipients():
+    store.increment_counter(email)
+store.export_file('data_files/keys.xlsx')
+```
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from utils.recipient_source import iter_rows, read_columns, write_rows
+
+# Spreadsheet column -> store column
+COLUMNS = {
+    'Nickname': 'nickname',
+    'Email': 'email',
+    'Days Receiving the email': 'days',
+    'Interests': 'interests',
+    'Current City': 'city',
+    'Current Country': 'country',
+}
+
+def _clean(value):
+    # Empty cells may come through as NaN (pandas) or '' (CSV)
+    if value is None or value == '' or (isinstance(value, float) and value != value):
+        return None
+    return value
+
+def _counter(value):
+    """
+    Parse a 'Days Receiving the email' cell; empty counts as 0. Returns None if the cell is not a whole number.
+    """
+    if value is None:
+        return 0
+    try:
+        number = float(value)
+        return int(number) if number == int(number) else None
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+class RecipientStore:
+    def __init__(self, path='data_files/recipients.sqlite'):
+        """
+        Args:
+            path (str): SQLite database file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL keeps each per-recipient commit to a single append
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS recipients (
+                email TEXT PRIMARY KEY,
+                nickname TEXT,
+                days INTEGER NOT NULL DEFAULT 0,
+                interests TEXT,
+                city TEXT,
+                country TEXT,
+                extra TEXT,
+                position INTEGER NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        # Rows repeating an email of an earlier row: written back by the export, never sent to
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS duplicates (
+                email TEXT,
+                nickname TEXT,
+                days,
+                interests TEXT,
+                city TEXT,
+                country TEXT,
+                extra TEXT,
+                position INTEGER PRIMARY KEY
+            )
+        ''')
+        # Deliveries already counted, so replaying the delivery journal is idempotent; `exported` marks the
+        # ones whose counters were written back to the recipient file
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS deliveries (
+                day TEXT NOT NULL,
+                email TEXT NOT NULL,
+                exported INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, email)
+            )
+        ''')
+        if 'exported' not in [column[1] for column in self._conn.execute('PRAGMA table_info(deliveries)')]:
+            self._conn.execute('ALTER TABLE deliveries ADD COLUMN exported INTEGER NOT NULL DEFAULT 0')
+        self._conn.commit()
+
+    def _get_meta(self, key, default=None):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, key, value):
+        self._conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, json.dumps(value)))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM recipients').fetchone()[0]
+
+    def import_rows(self, rows, columns, chunk_size=5000):
+        """
+        Replace the store's content with `rows` (dicts keyed by spreadsheet column) in the given column order.
+        Rows are consumed lazily and inserted `chunk_size` at a time in a single transaction.
+
+        Deliveries counted since the last export are applied again to the imported counters, which cannot
+        include them, so editing the file after an interrupted run does not lose those counts.
+
+        Bad cells are reported per row instead of failing the import: rows without an email are skipped, and
+        rows whose counter is not a whole number keep the cell as it is, so the export writes it back
+        unchanged, and are left out of `recipients()` until the cell is fixed. Rows repeating the email of an
+        earlier row are kept for the export too, but only the first row is a recipient.
+
+        Returns:
+            int: Number of recipients imported, not counting skipped or duplicate rows.
+        """
+        count = invalid = skipped = duplicates = 0
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM recipients')
+            self._conn.execute('DELETE FROM duplicates')
+            records = []
+            for position, row in enumerate(rows):
+                email = _clean(row.get('Email'))
+                if email is None:
+                    logging.warning(f"Recipient row {position + 1}: no email, the row is skipped.")
+                    skipped += 1
+                    continue
+                extra = {column: _clean(row.get(column)) for column in columns if column not in COLUMNS}
+                days = _clean(row.get('Days Receiving the email'))
+                counter = _counter(days)
+                if counter is None:
+                    logging.warning(f"Recipient row {position + 1} ({email}): 'Days Receiving the email' is {days!r}, "
+                                    f"not a whole number; no email is sent to this recipient until it is fixed.")
+                    invalid += 1
+                records.append((
+                    email,
+                    _clean(row.get('Nickname')),
+                    counter if counter is not None else str(days),
+                    _clean(row.get('Interests')),
+                    _clean(row.get('Current City')),
+                    _clean(row.get('Current Country')),
+                    json.dumps(extra, default=str),
+                    position,
+                ))
+                if len(records) >= chunk_size:
+                    inserted = self._insert(records)
+                    count += inserted
+                    duplicates += len(records) - inserted
+                    records = []
+            inserted = self._insert(records)
+            count += inserted
+            duplicates += len(records) - inserted
+            self._conn.execute('''
+                UPDATE recipients
+                SET days = days + (SELECT COUNT(*) FROM deliveries WHERE deliveries.email = recipients.email AND exported = 0)
+                WHERE typeof(days) = 'integer' AND email IN (SELECT email FROM deliveries WHERE exported = 0)
+            ''')
+            self._set_meta('columns', list(columns))
+        if invalid or skipped or duplicates:
+            logging.warning(f"Recipient import: {invalid} rows with an invalid counter held back, {skipped} rows without an email skipped, "
+                            f"{duplicates} duplicate rows held back.")
+        return count
+
+    def _insert(self, records):
+        """
+        Insert one chunk of records; rows whose email is already in the store go to `duplicates` instead.
+
+        Returns:
+            int: Number of recipients inserted.
+        """
+        if not records:
+            return 0
+        inserted = self._conn.executemany('INSERT OR IGNORE INTO recipients VALUES (?, ?, ?, ?, ?, ?, ?, ?)', records).rowcount
+        if inserted == len(records):
+            return inserted
+        # Positions grow within a chunk, so the rows that were not inserted are found by range
+        kept = {position for position, in self._conn.execute(
+            'SELECT position FROM recipients WHERE position BETWEEN ? AND ?', (records[0][-1], records[-1][-1])
+        )}
+        repeated = [record for record in records if record[-1] not in kept]
+        for record in repeated:
+            logging.warning(f"Recipient row {record[-1] + 1} ({record[0]}): duplicate of an earlier row with the same email; "
+                            f"it is kept in the file but no email is sent for it.")
+        self._conn.executemany('INSERT INTO duplicates VALUES (?, ?, ?, ?, ?, ?, ?, ?)', repeated)
+        return inserted
+
+    def import_file(self, path):
+        """
+        Import a recipient file (`keys.xlsx`, or a CSV or JSONL export of it), streaming it row by row.
+        """
+        count = self.import_rows(iter_rows(path), read_columns(path))
+        with self._lock, self._conn:
+            self._set_meta('source_mtime', os.path.getmtime(path))
+        logging.info(f"Imported {count} recipients from {path}.")
+        return count
+
+    def sync_from_file(self, path):
+        """
+        Import `path` only if it changed since the last import or export.
+
+        Returns:
+            bool: True if the file was imported.
+        """
+        if not os.path.exists(path):
+            return False
+        with self._lock:
+            known_mtime = self._get_meta('source_mtime')
+        if known_mtime == os.path.getmtime(path):
+            return False
+        self.import_file(path)
+        return True
+
+    def _iter_query(self, query, chunk_size):
+        # Iterate on a separate connection so send workers can commit counters while the run reads
+        conn = sqlite3.connect(self.path)
+        try:
+            cursor = conn.execute(query)
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    return
+                yield from chunk
+        finally:
+            conn.close()
+
+    def columns(self):
+        with self._lock:
+            return self._get_meta('columns', list(COLUMNS))
+
+    def iter_rows(self, chunk_size=5000):
+        """
+        Lazily yield every row as a dict keyed by spreadsheet column, duplicate rows included, in the original order.
+        """
+        columns = self.columns()
+        query = ('SELECT nickname, email, days, interests, city, country, extra, position FROM recipients UNION ALL '
+                 'SELECT nickname, email, days, interests, city, country, extra, position FROM duplicates ORDER BY position')
+        for nickname, email, days, interests, city, country, extra, _ in self._iter_query(query, chunk_size):
+            values = json.loads(extra) if extra else {}
+            values.update({
+                'Nickname': nickname,
+                'Email': email,
+                'Days Receiving the email': days,
+                'Interests': interests,
+                'Current City': city,
+                'Current Country': country,
+            })
+            yield {column: values.get(column) for column in columns}
+
+    def export_file(self, path):
+        """
+        Stream the store back to a recipient file (.xlsx, .csv or .jsonl) with the imported columns.
+        """
+        write_rows(path, self.iter_rows(), self.columns())
+        with self._lock, self._conn:
+            self._set_meta('source_mtime', os.path.getmtime(path))
+            self._conn.execute('UPDATE deliveries SET exported = 1')
+        logging.info(f"Exported recipients to {path}.")
+
+    def recipients(self, chunk_size=5000):
+        """
+        Lazily yield `(username, email, counter, interests, city, country)` tuples, where counter is the day
+        number of the email about to be sent, as `utils.utils.get_email_recipients` does. Rows are fetched
+        from SQLite `chunk_size` at a time. Recipients whose counter cell is invalid are left out.
+        """
+        query = ("SELECT nickname, email, days, interests, city, country FROM recipients "
+                 "WHERE typeof(days) = 'integer' ORDER BY position")
+        for nickname, email, days, interests, city, country in self._iter_query(query, chunk_size):
+            yield (nickname, email, days + 1, interests, city, country)
+
+    def get(self, email):
+        """
+        Look up one recipient by email; returns a dict keyed by store column, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT nickname, email, days, interests, city, country FROM recipients WHERE email = ?', (email,)
+            ).fetchone()
+        return dict(zip(('nickname', 'email', 'days', 'interests', 'city', 'country'), row)) if row else None
+
+    def increment_counter(self, email, by=1):
+        """
+        Increment 'Days Receiving the email' for one recipient and commit immediately.
+        """
+        with self._lock:
+            self._conn.execute('UPDATE recipients SET days = days + ? WHERE email = ?', (by, email))
+            self._conn.commit()
+
+    def apply_deliveries(self, day, emails):
+        """
+        Increment the counter of each recipient delivered on `day` that was not counted yet, in one transaction.
+        Deliveries from earlier days are forgotten once exported, since only the current day's journal is replayed.
+
+        Returns:
+            int: Number of counters incremented.
+        """
+        applied = 0
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM deliveries WHERE day < ? AND exported = 1', (day,))
+            for email in emails:
+                if self._conn.execute('INSERT OR IGNORE INTO deliveries (day, email) VALUES (?, ?)', (day, email)).rowcount:
+                    self._conn.execute('UPDATE recipients SET days = days + 1 WHERE email = ?', (email,))
+                    applied += 1
+        return applied
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def open_store(path=None):
+    """
+    Open the recipient store at `path` or `RECIPIENT_STORE`.
+    """
+    return RecipientStore(path or os.getenv('RECIPIENT_STORE', 'data_files/recipients.sqlite'))
@@ -0,0 +1,255 @@
+# utils/response_cache.py
+
+"""
+This script provides a persistent, SQLite-backed response cache consulted by the providers in `utils.utils`.
+Data such as the muffinlabs history per date, news RSS per topic and weather forecasts per city stays valid
+for hours, so re-runs after a crash and preview sessions can reuse it instead of fetching it again.
+
+Features:
+1. **Per-Provider TTLs**: Each provider has its own time-to-live, overridable with `CACHE_TTL_<PROVIDER>`
+   (e.g. `CACHE_TTL_GOOGLE_NEWS=1800`). A TTL of 0 disables caching for that provider; random content such
+   as the GIF, quote and fun fact is not cached by default.
+
+2. **Compressed Storage**: Response bodies are stored zlib-compressed in `data_files/http_cache.sqlite`
+   (configurable with `CACHE_PATH`). Keys are SHA-256 hashes of the URL, so API keys in query strings are
+   never written to disk.
+
+3. **Size-Bounded Eviction**: When the stored bodies exceed `CACHE_MAX_BYTES`, the least recently used
+   entries are evicted.
+
+4. **Conditional Revalidation**: Expired entries that carry an `ETag` or `Last-Modified` header are
+   revalidated with `If-None-Match`/`If-Modified-Since`; a `304 Not Modified` refreshes the entry without
+   downloading the body again.
+
+5. **Hit/Miss Counters**: `cache_stats()` reports hits, misses and revalidations; `log_cache_stats()` writes
+   them to the log.
+
+Usage:
+- Call `cached_get(provider, url)` instead of `http_get(url)`; it returns a `requests.Response`.
+- Set `CACHE_ENABLED=0` to bypass the cache entirely.
+
+Example:
+```
+from utils.response_cache import cached_get, log_cache_stats
+
+response = cached_get('muffinlabs', "https://history.muffinlabs.com/date/7/20")
+data = response.json()
+log_cache_stats()
+```
+"""
+
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from utils.http_client import http_get
+
+# Default time-to-live per provider, in seconds
+DEFAULT_TTLS = {
+    'giphy': 0,
+    'quotable': 0,
+    'useless_facts': 0,
+    'openweather': 3 * 3600,
+    'google_news': 3600,
+    'muffinlabs': 24 * 3600,
+}
+
+class ResponseCache:
+    def __init__(self, path='data_files/http_cache.sqlite', max_bytes=50 * 1024 * 1024):
+        """
+        Args:
+            path (str): SQLite database file.
+            max_bytes (int): Upper bound on the total size of stored (compressed) bodies.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                body BLOB NOT NULL,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+        self._conn.commit()
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def get(self, url):
+        """
+        Return the stored entry for `url` as a dict, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT body, content_type, etag, last_modified, fetched_at FROM responses WHERE key = ?',
+                (self.key(url),),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), self.key(url)))
+            self._conn.commit()
+        body, content_type, etag, last_modified, fetched_at = row
+        return {
+            'body': zlib.decompress(body),
+            'content_type': content_type,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': fetched_at,
+        }
+
+    def put(self, provider, url, body, content_type=None, etag=None, last_modified=None):
+        compressed = zlib.compress(body)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.key(url), provider, compressed, content_type, etag, last_modified, now, now, len(compressed)),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, url):
+        """
+        Mark an entry as freshly fetched after a successful revalidation.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute('UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE key = ?', (now, now, self.key(url)))
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute('SELECT key, size FROM responses ORDER BY accessed_at').fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            total -= size
+            self.stats['evicted'] += 1
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_cache = None
+_cache_lock = threading.Lock()
+# Caches inherited from a parent process, kept alive but unused (see `forget_cache`)
+_inherited_caches = []
+
+def get_cache():
+    """
+    Return the shared cache, or None when `CACHE_ENABLED` is off.
+    """
+    global _cache
+    if os.getenv('CACHE_ENABLED', '1') == '0':
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                path=os.getenv('CACHE_PATH', 'data_files/http_cache.sqlite'),
+                max_bytes=int(os.getenv('CACHE_MAX_BYTES', str(50 * 1024 * 1024))),
+            )
+        return _cache
+
+def forget_cache():
+    """
+    In a forked child process, stop using the cache inherited from the parent so the child opens its own
+    SQLite connection. The inherited connection is kept referenced rather than closed, since SQLite
+    connections must not be used, or closed, across a fork.
+    """
+    global _cache, _cache_lock
+    if _cache is not None:
+        _inherited_caches.append(_cache)
+    _cache = None
+    _cache_lock = threading.Lock()
+
+def provider_ttl(provider):
+    return float(os.getenv(f'CACHE_TTL_{provider.upper()}', DEFAULT_TTLS.get(provider, 0)))
+
+def _response_from_entry(url, entry):
+    import requests
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = entry['body']
+    if entry['content_type']:
+        response.headers['Content-Type'] = entry['content_type']
+    return response
+
+def cached_get(provider, url, **kwargs):
+    """
+    GET `url` through the persistent cache using the TTL configured for `provider`.
+
+    Args:
+        provider (str): Provider name used to look up the TTL (see `DEFAULT_TTLS`).
+        url (str): URL to fetch.
+        **kwargs: Extra arguments passed to `http_get`.
+
+    Returns:
+        requests.Response: A live response or one rebuilt from the cache.
+    """
+    cache = get_cache()
+    ttl = provider_ttl(provider)
+    if cache is None or ttl <= 0:
+        return http_get(url, **kwargs)
+
+    entry = cache.get(url)
+    if entry is not None and time.time() - entry['fetched_at'] < ttl:
+        cache.count('hits')
+        return _response_from_entry(url, entry)
+
+    headers = dict(kwargs.pop('headers', None) or {})
+    if entry is not None:
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    response = http_get(url, headers=headers, **kwargs)
+    if response.status_code == 304 and entry is not None:
+        cache.count('revalidated')
+        cache.touch(url)
+        return _response_from_entry(url, entry)
+
+    cache.count('misses')
+    if response.status_code == 200:
+        cache.put(
+            provider,
+            url,
+            response.content,
+            content_type=response.headers.get('Content-Type'),
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+        )
+    return response
+
+def cache_stats():
+    return dict(_cache.stats) if _cache is not None else {'hits': 0, 'misses': 0, 'revalidated': 0, 'evicted': 0}
+
+def log_cache_stats():
+    stats = cache_stats()
+    logging.info(f"Response cache: {stats['hits']} hits, {stats['misses']} misses, "
+                 f"{stats['revalidated']} revalidated, {stats['evicted']} evicted.")
+    return stats
@@ -21,6 +21,13 @@ Features:
 5. **SMTP Connection**: Establishes a secure connection to Gmail's SMTP server using `smtplib.SMTP_SSL`
    to send the email.
 
+6. **Connection Reuse**: `SMTPSender` keeps authenticated connections open across messages, recycles each
+   one after `SMTP_MAX_MESSAGES_PER_CONNECTION` messages and reconnects transparently on
+   `SMTPServerDisconnected`. `SMTP_HOST`, `SMTP_PORT` and `SMTP_SSL=0` point it at a local test server.
+
+7. **Bulk Sending**: `BulkSender` fans queued messages out across several connections with token-bucket rate
+   limits, returns a `SendResult` per message and reports throughput and p50/p95 latency.
+
 Usage:
 - Ensure that environment variables for Gmail user, password, and display name are set in a `.env` file.
 - Import the `send_email` function from this script.
@@ -44,34 +51,187 @@ attaching the specified files.
 """
 
 import os
+import time
+import queue
 import smtplib
 import logging
+import threading
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
 from email.utils import formataddr
 from dotenv import load_dotenv
-from typing import List, Optional
+from typing import Callable, List, NamedTuple, Optional
 from utils.logging_setup import setup_logging
+from utils.instrumentation import percentile, timed_stage
 
 # Load environment variables from .env file
 load_dotenv()
 
-def send_email(subject: str, to_email: str, html: str, attachments: Optional[List[str]] = None) -> None:
+class SMTPSender:
     """
-    Send an email with the specified subject, recipient, and HTML content.
-    Optionally attach files.
+    Keeps up to `pool_size` authenticated SMTP connections open and sends many messages over each one.
+    A connection is recycled after `max_messages_per_connection` messages and transparently re-opened
+    when the server drops it.
+    """
+
+    def __init__(self, host: str = 'smtp.gmail.com', port: int = 465, user: Optional[str] = None,
+                 password: Optional[str] = None, use_ssl: bool = True, pool_size: int = 1,
+                 max_messages_per_connection: int = 100, timeout: float = 30):
+        """
+        Args:
+            host (str): SMTP server host.
+            port (int): SMTP server port.
+            user (Optional[str]): Login user; no login is attempted when user or password is empty.
+            password (Optional[str]): Login password.
+            use_ssl (bool): Connect with `SMTP_SSL` instead of plain `SMTP`.
+            pool_size (int): Maximum number of open connections.
+            max_messages_per_connection (int): Messages sent before a connection is closed and replaced.
+            timeout (float): Socket timeout in seconds.
+        """
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_ssl = use_ssl
+        self.pool_size = pool_size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.timeout = timeout
+        self.stats = {'connections_opened': 0, 'messages_sent': 0, 'reconnects': 0}
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _connect(self):
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        server = smtp_class(self.host, self.port, timeout=self.timeout)
+        if self.user and self.password:
+            logging.info("Logging in...")
+            server.login(self.user, self.password)
+        server.messages_sent = 0
+        self._count('connections_opened')
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                return self._connect()
+            except Exception:
+                self._slots.release()
+                raise
+
+    def _release(self, server):
+        if server is not None:
+            if server.messages_sent >= self.max_messages_per_connection:
+                self._close(server)
+            else:
+                self._idle.put(server)
+        self._slots.release()
+
+    @timed_stage('smtp_send')
+    def send(self, msg: MIMEMultipart, to_email: str) -> None:
+        """
+        Send a prepared message over a pooled connection, reconnecting once if the server disconnected.
+        SMTP errors other than a disconnect are raised to the caller.
+        """
+        server = self._acquire()
+        try:
+            try:
+                server.sendmail(self.user or '', to_email, msg.as_string())
+            except smtplib.SMTPServerDisconnected:
+                logging.info("SMTP connection dropped, reconnecting...")
+                self._count('reconnects')
+                server.close()
+                server = None
+                server = self._connect()
+                server.sendmail(self.user or '', to_email, msg.as_string())
+            server.messages_sent += 1
+            self._count('messages_sent')
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+            # smtplib resets the session after a refused message, so the connection stays usable
+            raise
+        except Exception:
+            if server is not None:
+                server.close()
+                server = None
+            raise
+        finally:
+            self._release(server)
+
+    def close(self) -> None:
+        """
+        Close every idle connection.
+        """
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+_default_sender = None
+_default_sender_lock = threading.Lock()
+
+def sender_from_env(pool_size: Optional[int] = None) -> SMTPSender:
+    """
+    Build an `SMTPSender` configured from the GMAIL_* and SMTP_* environment variables.
+    `pool_size` overrides `SMTP_POOL_SIZE`.
+    """
+    return SMTPSender(
+        host=os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+        port=int(os.getenv('SMTP_PORT', '465')),
+        user=os.getenv('GMAIL_USER'),
+        password=os.getenv('GMAIL_PASSWORD'),
+        use_ssl=os.getenv('SMTP_SSL', '1') != '0',
+        pool_size=pool_size or int(os.getenv('SMTP_POOL_SIZE', '1')),
+        max_messages_per_connection=int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', '100')),
+    )
+
+def get_default_sender() -> SMTPSender:
+    """
+    Return the shared sender used by `send_email`, creating it on first use.
+    """
+    global _default_sender
+    with _default_sender_lock:
+        if _default_sender is None:
+            _default_sender = sender_from_env()
+        return _default_sender
+
+def build_message(subject: str, to_email: str, html: str, attachments: Optional[List[str]] = None) -> MIMEMultipart:
+    """
+    Build the MIME message for an email with HTML content and optional attachments.
 
     Args:
         subject (str): Subject of the email.
         to_email (str): Recipient's email address.
         html (str): HTML content of the email.
         attachments (Optional[List[str]]): List of file paths to attach.
+
+    Returns:
+        MIMEMultipart: The message ready to be sent.
     """
-    # Load environment variables
     gmail_user = os.getenv("GMAIL_USER")
-    gmail_password = os.getenv("GMAIL_PASSWORD")
     display_name = os.getenv("DISPLAY_NAME")
 
     # Create the MIME object
@@ -100,25 +260,220 @@ def send_email(subject: str, to_email: str, html: str, attachments: Optional[Lis
                 logging.info(f"Attached file: {file_path}")
             except Exception as e:
                 logging.error(f"Failed to attach file {file_path}: {e}")
+    return msg
+
+def describe_send_error(error: Exception) -> str:
+    """
+    Return the log message used for an exception raised while sending.
+    """
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return "Error: SMTP Authentication failed."
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return "Error: The recipient's address was refused."
+    if isinstance(error, smtplib.SMTPSenderRefused):
+        return "Error: The sender's address was refused."
+    if isinstance(error, smtplib.SMTPDataError):
+        return "Error: The SMTP server refused to accept the message data."
+    return f"Unexpected error: {error}"
+
+def send_email(subject: str, to_email: str, html: str, attachments: Optional[List[str]] = None,
+               sender: Optional[SMTPSender] = None) -> bool:
+    """
+    Send an email with the specified subject, recipient, and HTML content.
+    Optionally attach files. Messages go over the pooled connections of `sender`
+    (the shared default sender when omitted).
+
+    Args:
+        subject (str): Subject of the email.
+        to_email (str): Recipient's email address.
+        html (str): HTML content of the email.
+        attachments (Optional[List[str]]): List of file paths to attach.
+        sender (Optional[SMTPSender]): Sender whose connections are reused.
+
+    Returns:
+        bool: True if the message was accepted by the server. Errors are logged, not raised.
+    """
+    msg = build_message(subject, to_email, html, attachments)
+    sender = sender or get_default_sender()
 
-    # Connect to Gmail's SMTP server and send the email
     try:
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            logging.info("Logging in...")
-            server.login(gmail_user, gmail_password)
-            logging.info("Sending email...")
-            server.sendmail(gmail_user, to_email, msg.as_string())
-            logging.info("Email sent successfully!")
-    except smtplib.SMTPAuthenticationError:
-        logging.error("Error: SMTP Authentication failed.")
-    except smtplib.SMTPRecipientsRefused:
-        logging.error("Error: The recipient's address was refused.")
-    except smtplib.SMTPSenderRefused:
-        logging.error("Error: The sender's address was refused.")
-    except smtplib.SMTPDataError:
-        logging.error("Error: The SMTP server refused to accept the message data.")
+        logging.info("Sending email...")
+        sender.send(msg, to_email)
+        logging.info("Email sent successfully!")
+        return True
     except Exception as e:
-        logging.error(f"Unexpected error: {e}")
+        logging.error(describe_send_error(e))
+        return False
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: `acquire()` blocks until a token is available.
+    Tokens refill at `rate` per second up to `capacity` (defaults to one second's worth).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class SendResult(NamedTuple):
+    to_email: str
+    ok: bool
+    error: Optional[str]
+    latency: float
+
+class BulkSender:
+    """
+    Fans messages out across `workers` concurrent SMTP connections.
+
+    Rendered messages are pushed with `submit()` into a bounded queue, so a producer that outpaces the
+    senders blocks instead of piling up messages in memory. A shared token bucket caps the overall rate
+    (`rate` messages/sec) and each worker, which holds at most one connection at a time, has its own bucket
+    (`per_connection_rate`). Every message yields a `SendResult`; `report()` summarizes throughput and latency.
+    """
+
+    _STOP = object()
+
+    def __init__(self, sender: Optional[SMTPSender] = None, workers: int = 4, rate: Optional[float] = None,
+                 per_connection_rate: Optional[float] = None, queue_size: int = 100,
+                 on_result: Optional[Callable[[SendResult], None]] = None):
+        """
+        Args:
+            sender (Optional[SMTPSender]): Sender to use; one with `pool_size=workers` is built from the environment otherwise.
+            workers (int): Number of concurrent send workers (and connections).
+            rate (Optional[float]): Maximum messages per second across all workers.
+            per_connection_rate (Optional[float]): Maximum messages per second per worker.
+            queue_size (int): Capacity of the queue of rendered messages.
+            on_result (Optional[Callable]): Called from the send worker with each `SendResult` as soon as it is known.
+        """
+        self.sender = sender or sender_from_env(pool_size=workers)
+        self.workers = workers
+        self.results: List[SendResult] = []
+        self._bucket = TokenBucket(rate) if rate else None
+        self._per_connection_rate = per_connection_rate
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._on_result = on_result
+        self._results_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._started = None
+        self._finished = None
+
+    def start(self) -> 'BulkSender':
+        """
+        Start the send workers; does nothing if they are already running.
+        """
+        if self._threads:
+            return self
+        self._started = time.perf_counter()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f'smtp-send-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, subject: str, to_email: str, html: str, attachments: Optional[List[str]] = None) -> None:
+        """
+        Queue a message for sending, blocking while the queue is full.
+        """
+        self._queue.put((to_email, build_message(subject, to_email, html, attachments)))
+
+    def submit_message(self, msg: MIMEMultipart, to_email: str) -> None:
+        """
+        Queue an already built MIME message, blocking while the queue is full.
+        """
+        self._queue.put((to_email, msg))
+
+    def _worker(self) -> None:
+        bucket = TokenBucket(self._per_connection_rate) if self._per_connection_rate else None
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            to_email, msg = item
+            if self._bucket:
+                self._bucket.acquire()
+            if bucket:
+                bucket.acquire()
+            start = time.perf_counter()
+            try:
+                self.sender.send(msg, to_email)
+                result = SendResult(to_email, True, None, time.perf_counter() - start)
+            except Exception as e:
+                error = describe_send_error(e)
+                logging.error(f"Failed to send to {to_email}: {error}")
+                result = SendResult(to_email, False, error, time.perf_counter() - start)
+            with self._results_lock:
+                self.results.append(result)
+            if self._on_result:
+                try:
+                    self._on_result(result)
+                except Exception as e:
+                    logging.error(f"Result callback failed for {to_email}: {e}")
+
+    def join(self) -> List[SendResult]:
+        """
+        Wait for every queued message to be sent, stop the workers and return the per-message results.
+        """
+        if not self._threads:
+            return self.results
+        for _ in self._threads:
+            self._queue.put(self._STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._finished = time.perf_counter()
+        return self.results
+
+    def report(self) -> dict:
+        """
+        Summarize the run: sent/failed counts, throughput in msgs/sec and p50/p95 send latency in seconds.
+        """
+        elapsed = ((self._finished or time.perf_counter()) - self._started) if self._started else 0.0
+        latencies = [result.latency for result in self.results]
+        sent = sum(1 for result in self.results if result.ok)
+        return {
+            'sent': sent,
+            'failed': len(self.results) - sent,
+            'elapsed': elapsed,
+            'msgs_per_sec': len(self.results) / elapsed if elapsed else 0.0,
+            'p50_latency': percentile(latencies, 50),
+            'p95_latency': percentile(latencies, 95),
+        }
+
+    def log_report(self) -> dict:
+        report = self.report()
+        logging.info(f"Bulk send: {report['sent']} sent, {report['failed']} failed in {report['elapsed']:.2f}s "
+                     f"({report['msgs_per_sec']:.1f} msgs/sec, p50 {report['p50_latency'] * 1000:.0f} ms, "
+                     f"p95 {report['p95_latency'] * 1000:.0f} ms).")
+        return report
+
+    def close(self) -> None:
+        """
+        Send everything still queued, stop the workers and close the SMTP connections.
+        """
+        self.join()
+        self.sender.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
 
 if __name__ == "__main__":
     # Test the function
@@ -0,0 +1,165 @@
+# utils/skeleton.py
+
+"""
+This script provides the two-phase email render. Most of `email_template.html` is identical for every
+recipient (quote, GIF, history, fun fact and the page structure), so it is rendered and CSS-inlined once per
+day; each recipient's email is then assembled by splicing the per-recipient parts into that skeleton.
+
+Features:
+1. **Phase One (once per day)**: `EmailSkeleton` renders `email_template.html` with the shared content, with
+   `weather_widget.html` and `news.html` replaced by slot markers and the header values (`USER_NAME`,
+   `current_date`, `counter`) replaced by placeholders, and inlines the result with the compiled stylesheet.
+
+2. **Phase Two (per recipient)**: `EmailSkeleton.render(context)` substitutes the header values and splices
+   in the inlined weather and news fragments, which reduces the per-recipient cost to string assembly.
+
+3. **Fragment Cache**: Inlined fragments are cached by their rendered (pre-inline) HTML. A fragment is
+   inlined in the context of the full skeleton the first time it is seen, so the result is exactly what a
+   full render produces; recipients sharing a city or a set of topics reuse it.
+
+4. **Safe Fallback**: Values that HTML parsing would change (`<`, `>` or `&` in header values), slot markers
+   appearing in the content, or stylesheets with sibling/structural selectors make `render` return None so
+   the caller falls back to the full render.
+
+Usage:
+- Build one skeleton per day with `get_skeleton(env, inliner, shared_content)` and call `render(context)`
+  with the same context `create_email_content` passes to `email_template.html`.
+
+Example:
+```
+from utils.skeleton import get_skeleton
+
+skeleton = get_skeleton(env, get_inliner(), shared_content)
+final_html = skeleton.render(context)
+```
+"""
+
+import re
+import threading
+import jinja2
+from utils.instrumentation import timed
+
+# Per-recipient template variables that only appear as plain text in header.html
+HEADER_FIELDS = ('USER_NAME', 'current_date', 'counter')
+
+# Included templates whose output varies per recipient, keyed by slot name
+SLOT_TEMPLATES = {'weather': 'weather_widget.html', 'news': 'news.html'}
+
+# Stylesheet link in head.html, removed before inlining since the CSS is inlined instead
+STYLESHEET_LINK = '<link rel="stylesheet" href="static/css/email_style.css">'
+
+_structural_selector_regex = re.compile(r'[+~]|:(first|last|nth|only)-')
+_unsafe_text_regex = re.compile(r'[<>&]')
+
+def _field_marker(name):
+    return f'[[skeleton-field:{name}]]'
+
+def _slot_start(name):
+    return f'[[skeleton-slot:{name}]]'
+
+def _slot_end(name):
+    return f'[[/skeleton-slot:{name}]]'
+
+class EmailSkeleton:
+    def __init__(self, env, inliner, shared_content, template_name='email_template.html'):
+        """
+        Args:
+            env (jinja2.Environment): Environment with the `templates/` loader.
+            inliner (CSSInliner): Compiled stylesheet used for the full render.
+            shared_content (dict): Template fields shared by every recipient.
+            template_name (str): Top-level email template.
+        """
+        self.env = env
+        self.inliner = inliner
+        self.shared_content = shared_content
+        self.enabled = not any(_structural_selector_regex.search(selector) for selector in inliner.selectors)
+        self._fragments = {name: {} for name in SLOT_TEMPLATES}
+        self._lock = threading.Lock()
+
+        # Render the template with empty slot markers instead of the per-recipient includes
+        slot_env = env.overlay(loader=jinja2.ChoiceLoader([
+            jinja2.DictLoader({template: _slot_start(name) + _slot_end(name) for name, template in SLOT_TEMPLATES.items()}),
+            env.loader,
+        ]))
+        fields = {name: _field_marker(name) for name in HEADER_FIELDS}
+        with timed('render.skeleton_build'):
+            self._raw = slot_env.get_template(template_name).render(**shared_content, **fields)
+            self._raw = self._raw.replace(STYLESHEET_LINK, '')
+            self._inlined = self._pieces(inliner.transform(self._raw))
+
+    def _pieces(self, inlined):
+        for name in SLOT_TEMPLATES:
+            start, end = _slot_start(name), _slot_end(name)
+            if inlined.count(start) != 1 or inlined.count(end) != 1:
+                self.enabled = False
+                return inlined
+            before, rest = inlined.split(start, 1)
+            _, after = rest.split(end, 1)
+            inlined = before + start + after
+        return inlined
+
+    def _fragment(self, name, raw_fragment):
+        cache = self._fragments[name]
+        with self._lock:
+            if raw_fragment in cache:
+                return cache[raw_fragment]
+        # Inline the fragment in place within the skeleton so ancestors and cascade match the full render
+        raw = self._raw.replace(_slot_start(name) + _slot_end(name), _slot_start(name) + raw_fragment + _slot_end(name))
+        inlined = self.inliner.transform(raw)
+        fragment = inlined.split(_slot_start(name), 1)[1].split(_slot_end(name), 1)[0]
+        with self._lock:
+            cache[raw_fragment] = fragment
+        return fragment
+
+    def render(self, context):
+        """
+        Assemble the inlined email for one recipient.
+
+        Args:
+            context (dict): The full template context for `email_template.html`.
+
+        Returns:
+            Optional[str]: The inlined HTML, or None when the caller must fall back to the full render.
+        """
+        if not self.enabled:
+            return None
+        values = {name: str(context[name]) for name in HEADER_FIELDS}
+        if any(_unsafe_text_regex.search(value) or '[[' in value for value in values.values()):
+            return None
+
+        html = self._inlined
+        for name, template in SLOT_TEMPLATES.items():
+            with timed('render.jinja'):
+                raw_fragment = self.env.get_template(template).render(**context)
+            if '[[' in raw_fragment:
+                return None
+            html = html.replace(_slot_start(name), self._fragment(name, raw_fragment))
+        for name, value in values.items():
+            html = html.replace(_field_marker(name), value)
+        return html
+
+def render_full(env, inliner, context, template_name='email_template.html'):
+    """
+    Single-phase render: render the whole template for one recipient and inline it.
+    This is the reference output the skeleton reproduces and the fallback when it cannot.
+    """
+    with timed('render.jinja'):
+        html_content = env.get_template(template_name).render(**context)
+    return inliner.transform(html_content.replace(STYLESHEET_LINK, ''))
+
+_skeleton = None
+_skeleton_key = None
+_skeleton_lock = threading.Lock()
+
+def get_skeleton(env, inliner, shared_content):
+    """
+    Return the skeleton for the given shared content, building it only when the content, stylesheet or
+    template environment changes.
+    """
+    global _skeleton, _skeleton_key
+    key = repr(sorted(shared_content.items()))
+    with _skeleton_lock:
+        if _skeleton is None or _skeleton_key != key or _skeleton.inliner is not inliner or _skeleton.env is not env:
+            _skeleton = EmailSkeleton(env, inliner, shared_content)
+            _skeleton_key = key
+        return _skeleton
@@ -0,0 +1,97 @@
+# utils/templating.py
+
+"""
+This script provides the shared Jinja2 rendering environment. Creating a new `jinja2.Environment` for every
+email discards Jinja's template cache and recompiles `email_template.html` and all of its includes each time;
+a single module-level environment compiles each template once per process, and a persistent bytecode cache
+on disk lets new processes (scheduled runs, render workers) skip the compilation as well.
+
+Features:
+1. **Reusable Environment**: `get_environment()` returns one environment per mode for the whole process.
+
+2. **Bytecode Cache**: Compiled templates are stored with `jinja2.FileSystemBytecodeCache` in
+   `data_files/jinja_cache` (configurable with `TEMPLATE_CACHE_DIR`) and reused by later runs.
+
+3. **Ahead-of-Time Compilation**: `precompile_templates()` compiles every template under `templates/`
+   into the bytecode cache, e.g. from a deploy step with `python -m utils.templating`.
+
+4. **Auto-Reload Only in Preview**: The send path uses `auto_reload=False`, so templates are never
+   re-checked on disk; `get_environment(preview=True)` enables auto-reload for template editing.
+
+Usage:
+- Call `get_environment()` instead of building a `jinja2.Environment`.
+
+Example:
+```
+from utils.templating import get_environment
+
+template = get_environment().get_template('email_template.html')
+html = template.render(**context)
+```
+"""
+
+import os
+import logging
+import threading
+import jinja2
+
+TEMPLATE_FOLDER = 'templates'
+
+_environments = {}
+_environments_lock = threading.Lock()
+
+def create_environment(preview=False, template_folder=TEMPLATE_FOLDER, cache_dir=None):
+    """
+    Build a Jinja2 environment with a persistent bytecode cache.
+
+    Args:
+        preview (bool): Re-check templates on disk on every access (for the preview server).
+        template_folder (str): Directory holding the templates.
+        cache_dir (Optional[str]): Bytecode cache directory; defaults to `TEMPLATE_CACHE_DIR`.
+
+    Returns:
+        jinja2.Environment: The configured environment.
+    """
+    cache_dir = cache_dir or os.getenv('TEMPLATE_CACHE_DIR', 'data_files/jinja_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return jinja2.Environment(
+        loader=jinja2.FileSystemLoader(template_folder),
+        bytecode_cache=jinja2.FileSystemBytecodeCache(cache_dir),
+        auto_reload=preview,
+    )
+
+def get_environment(preview=False):
+    """
+    Return the process-wide environment for the given mode, creating it on first use.
+    """
+    with _environments_lock:
+        if preview not in _environments:
+            _environments[preview] = create_environment(preview=preview)
+        return _environments[preview]
+
+def discard_environment(preview=False):
+    """
+    Drop the process-wide environment for the given mode, so the next `get_environment` call compiles the
+    templates again from disk. The preview server calls it when a template changes, since the send-path
+    environment (`auto_reload=False`) never looks at the files again.
+    """
+    with _environments_lock:
+        _environments.pop(preview, None)
+
+def precompile_templates(env=None):
+    """
+    Compile every template under `templates/` into the environment's caches.
+
+    Returns:
+        list: Names of the compiled templates.
+    """
+    env = env or get_environment()
+    names = env.list_templates(extensions=['html'])
+    for name in names:
+        env.get_template(name)
+    logging.info(f"Precompiled {len(names)} templates.")
+    return names
+
+if __name__ == "__main__":
+    for name in precompile_templates():
+        print(name)
@@ -19,12 +19,14 @@ Features:
    - `get_weather_tip(description)`: Provides a weather tip based on the weather description.
 
 4. **Historical Data**: Fetches historical events, births, and deaths that occurred on the current day.
+   - `get_on_this_day(month=None, day=None)`: Fetches the day's payload once and caches the parsed result.
    - `get_this_day_in_history()`: Fetches and returns a historical event for the current day.
    - `get_historical_birthdays()`: Fetches and returns a list of notable births on the current day.
    - `get_historical_deaths()`: Fetches and returns a list of notable deaths on the current day.
 
 5. **News Fetching**: Fetches the latest news articles on specified topics from Google News.
    - `fetch_news(topic, num_articles=3)`: Fetches and returns a list of news articles for the given topic.
+   - `parse_news_items(content, num_articles=3)`: Stream-parses an RSS feed and stops after `num_articles` items.
 
 6. **Fun Fact**: Fetches a random fun fact from the Useless Facts API.
    - `get_fun_fact()`: Fetches and returns a random fun fact.
@@ -59,41 +61,64 @@ This example demonstrates how to fetch various data, update the counter, read fi
 """
 
 import os
-import requests
-from bs4 import BeautifulSoup
+import re
+import functools
+from utils.response_cache import cached_get
+from utils.instrumentation import timed_stage
 import logging
 from datetime import datetime
-import cssutils
 import random
-from crossword import Crossword
-import openpyxl
-
-# Suppress cssutils logging
-cssutils.log.setLevel(logging.CRITICAL)
+import threading
 
 COUNTER_FILE = 'data_files/counter.txt'
 
+# Provider hosts, also used as keys for per-host concurrency limits in utils.fetch_engine
+GIPHY_HOST = 'api.giphy.com'
+QUOTABLE_HOST = 'api.quotable.io'
+OPENWEATHER_HOST = 'api.openweathermap.org'
+MUFFINLABS_HOST = 'history.muffinlabs.com'
+GOOGLE_NEWS_HOST = 'news.google.com'
+USELESS_FACTS_HOST = 'uselessfacts.jsph.pl'
+
+def provider_url(host, path, scheme='https'):
+    """
+    Build a provider URL. When `PROVIDER_BASE_URL` is set (e.g. to a local stub server for benchmarks),
+    every provider is routed there instead, with the provider host as the first path segment.
+    """
+    base_url = os.getenv('PROVIDER_BASE_URL')
+    if base_url:
+        return f"{base_url.rstrip('/')}/{host}{path}"
+    return f"{scheme}://{host}{path}"
+
+# Parsed muffinlabs payloads keyed by (month, day), shared by the three history views
+_on_this_day_cache = {}
+_on_this_day_lock = threading.Lock()
+
+@timed_stage('provider.get_gif')
 def get_gif():
     logging.info("Fetching GIF of the day.")
-    response = requests.get(f"https://api.giphy.com/v1/gifs/random?tag=motivational&api_key={os.getenv('GIPHY_API_KEY')}")
+    response = cached_get('giphy', provider_url(GIPHY_HOST, f"/v1/gifs/random?tag=motivational&api_key={os.getenv('GIPHY_API_KEY')}"))
     gif_data = response.json()['data']
     gif_url = gif_data['images']['original']['url']
     logging.info(f"GIF URL: {gif_url}")
     return gif_url
 
+@timed_stage('provider.get_quote')
 def get_quote():
     logging.info("Fetching quote of the day.")
-    response = requests.get("https://api.quotable.io/random?tags=inspirational")
+    response = cached_get('quotable', provider_url(QUOTABLE_HOST, "/random?tags=inspirational"))
     quote_data = response.json()
     quote = f"{quote_data['content']} - {quote_data['author']}"
     logging.info(f"Quote: {quote}")
     return quote
 
+@timed_stage('provider.get_weather')
 def get_weather(city, country):
+    import requests
     logging.info(f"Fetching weather forecast for {city}, {country}.")
     try:
-        url = f"http://api.openweathermap.org/data/2.5/forecast?q={city},{country}&appid={os.getenv('OPENWEATHER_API_KEY')}&units=metric"
-        response = requests.get(url)
+        url = provider_url(OPENWEATHER_HOST, f"/data/2.5/forecast?q={city},{country}&appid={os.getenv('OPENWEATHER_API_KEY')}&units=metric", scheme='http')
+        response = cached_get('openweather', url)
         response.raise_for_status()
         weather_data = response.json()
         
@@ -201,53 +226,77 @@ def get_weather_tip(description):
     }
     return tips.get(description.lower(), "Check the forecast for detailed weather information.")
 
+@timed_stage('provider.get_on_this_day')
+def get_on_this_day(month=None, day=None):
+    """
+    Fetch and parse the muffinlabs "on this day" payload once per date.
+    The parsed 'data' section (Events, Births, Deaths) is cached, so later calls for the same date are free.
+    """
+    if month is None or day is None:
+        today = datetime.now()
+        month, day = today.month, today.day
+    with _on_this_day_lock:
+        if (month, day) not in _on_this_day_cache:
+            logging.info(f"Fetching on this day payload for {month}/{day}.")
+            response = cached_get('muffinlabs', provider_url(MUFFINLABS_HOST, f"/date/{month}/{day}"))
+            _on_this_day_cache[(month, day)] = response.json()['data']
+        return _on_this_day_cache[(month, day)]
+
 def get_this_day_in_history():
     logging.info("Fetching this day in history.")
-    today = datetime.now()
-    month, day = today.month, today.day
-    response = requests.get(f"https://history.muffinlabs.com/date/{month}/{day}")
-    data = response.json()
-    event = data['data']['Events'][0]
+    event = get_on_this_day()['Events'][0]
     return f"{event['year']}: {event['text']}"
 
-def fetch_news(topic, num_articles=3):
-    url = f"https://news.google.com/rss/search?q={topic}&hl=en-CA&gl=CA&ceid=CA:en"
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, features="xml")
-    items = soup.findAll('item')[:num_articles]
-    
+def parse_news_items(content, num_articles=3, chunk_size=16384):
+    """
+    Stream-parse an RSS document and return the first `num_articles` items as article dicts
+    ({'title', 'link', 'pub_date'}). The document is fed to an expat pull parser in chunks and parsing
+    stops as soon as enough items are complete, so the rest of the feed is never parsed.
+    A malformed document (an HTML error page, a truncated feed) is logged and the items parsed before
+    the error are returned.
+    """
+    from xml.etree.ElementTree import XMLPullParser, ParseError
+    parser = XMLPullParser(events=('end',))
     articles = []
-    for item in items:
-        article = {
-            'title': item.title.text,
-            'link': item.link.text,
-            'pub_date': item.pubDate.text
-        }
-        articles.append(article)
-    
+    try:
+        for offset in range(0, len(content), chunk_size):
+            parser.feed(content[offset:offset + chunk_size])
+            for _, element in parser.read_events():
+                if element.tag != 'item':
+                    continue
+                articles.append({
+                    'title': element.findtext('title', ''),
+                    'link': element.findtext('link', ''),
+                    'pub_date': element.findtext('pubDate', ''),
+                })
+                element.clear()
+                if len(articles) >= num_articles:
+                    return articles
+    except ParseError as e:
+        logging.error(f"Error parsing news feed after {len(articles)} items: {e}")
     return articles
 
+@timed_stage('provider.fetch_news')
+def fetch_news(topic, num_articles=3):
+    url = provider_url(GOOGLE_NEWS_HOST, f"/rss/search?q={topic}&hl=en-CA&gl=CA&ceid=CA:en")
+    response = cached_get('google_news', url)
+    if response.status_code != 200:
+        logging.error(f"Error fetching news for {topic}: HTTP {response.status_code}")
+        return []
+    return parse_news_items(response.content, num_articles)
+
 def get_historical_birthdays():
-    today = datetime.now()
-    month, day = today.month, today.day
-    url = f"https://history.muffinlabs.com/date/{month}/{day}"
-    response = requests.get(url)
-    data = response.json()
-    births = data['data']['Births'][:3]
+    births = get_on_this_day()['Births'][:3]
     return [f"{person['year']}: {person['text']}" for person in births]
 
 def get_historical_deaths():
-    today = datetime.now()
-    month, day = today.month, today.day
-    url = f"https://history.muffinlabs.com/date/{month}/{day}"
-    response = requests.get(url)
-    data = response.json()
-    deaths = data['data']['Deaths'][:3]
+    deaths = get_on_this_day()['Deaths'][:3]
     return [f"{person['year']}: {person['text']}" for person in deaths]
 
+@timed_stage('provider.get_fun_fact')
 def get_fun_fact():
     logging.info("Fetching fun fact.")
-    response = requests.get("https://uselessfacts.jsph.pl/random.json?language=en")
+    response = cached_get('useless_facts', provider_url(USELESS_FACTS_HOST, "/random.json?language=en"))
     fact_data = response.json()
     return fact_data['text']
 
@@ -271,22 +320,106 @@ def read_file(filename):
     with open(filename, 'r', encoding='utf-8') as f:
         return f.read()
 
+# Rightmost compound selector of a selector, split on descendant/child/sibling combinators
+_combinator_regex = re.compile(r'\s*[\s>+~]\s*')
+_simple_selector_regex = re.compile(r'^[.#]?[\w-]+$')
+
+def _index_key(selector_text):
+    """
+    Return the index lookup ('id'|'class'|'tag', name) for the rightmost compound of a selector, or None
+    when every element is a candidate (universal, attribute-only or pseudo-class-only compounds).
+    """
+    compound = _combinator_regex.split(selector_text.strip())[-1]
+    if '[' in compound or '(' in compound:
+        return None
+    id_match = re.search(r'#([\w-]+)', compound)
+    if id_match:
+        return ('id', id_match.group(1))
+    class_match = re.search(r'\.([\w-]+)', compound)
+    if class_match:
+        return ('class', class_match.group(1))
+    tag_match = re.match(r'[a-zA-Z][\w-]*', compound)
+    if tag_match:
+        return ('tag', tag_match.group(0).lower())
+    return None
+
+@functools.lru_cache(maxsize=8)
+def _compile_stylesheet(css):
+    """
+    Parse `css` once into (index key, matcher, specificity, source order, declarations) per selector.
+    The matcher is None for single tag/class/id selectors, where the index lookup is already exact.
+    """
+    import cssutils
+    import soupsieve
+    # Suppress cssutils logging
+    cssutils.log.setLevel(logging.CRITICAL)
+    compiled = []
+    for order, rule in enumerate(cssutils.parseString(css)):
+        if rule.type != rule.STYLE_RULE:
+            continue
+        declarations = [(prop.name, prop.value, prop.priority == 'important') for prop in rule.style.getProperties()]
+        for selector in rule.selectorList:
+            text = selector.selectorText
+            try:
+                matcher = None if _simple_selector_regex.match(text) else soupsieve.compile(text)
+            except soupsieve.SelectorSyntaxError:
+                # Pseudo-elements and states such as ::before or :hover never apply inline
+                continue
+            compiled.append((_index_key(text), matcher, selector.specificity, order, declarations))
+    return compiled
+
 def inline_css(html, css):
+    """
+    Inline the style rules of `css` into the `style` attribute of the matching elements of `html`, and
+    append `css` to the head as a `<style>` block for the rules that cannot be inlined (e.g. media queries).
+
+    The DOM is indexed once by tag, class and id, and each selector only checks the elements listed under
+    its rightmost id, class or tag. Declarations are merged per element with the CSS cascade (`!important`,
+    then specificity, then source order, with the existing `style` attribute above normal rules) and each
+    element's `style` is written once.
+    """
+    # Only needed by this legacy inliner, so imported here rather than on every startup
+    import cssutils
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(html, 'html.parser')
-    style = cssutils.parseString(css)
-    
-    for rule in style:
-        if rule.type == rule.STYLE_RULE:
-            for selector in rule.selectorList:
-                for tag in soup.select(selector.selectorText):
-                    if not tag.get('style'):
-                        tag['style'] = ''
-                    tag['style'] += f'{rule.style.cssText};'
-    
+
+    elements = soup.find_all(True)
+    index = {'tag': {}, 'class': {}, 'id': {}}
+    for tag in elements:
+        index['tag'].setdefault(tag.name, []).append(tag)
+        for class_name in tag.get('class', []):
+            index['class'].setdefault(class_name, []).append(tag)
+        if tag.get('id'):
+            index['id'].setdefault(tag['id'], []).append(tag)
+
+    matched = {}
+    for key, matcher, specificity, order, declarations in _compile_stylesheet(css):
+        candidates = elements if key is None else index[key[0]].get(key[1], ())
+        for tag in candidates:
+            if matcher is None or matcher.match(tag):
+                matched.setdefault(id(tag), (tag, []))[1].append((specificity, order, declarations))
+
+    # The style attribute outranks every selector, so it sorts after them at equal importance
+    inline_specificity = (1, 0, 0, 0)
+    for tag, rules in matched.values():
+        cascade = []
+        for specificity, order, declarations in rules:
+            cascade.extend((important, specificity, order, position, name, value)
+                           for position, (name, value, important) in enumerate(declarations))
+        if tag.get('style'):
+            for position, prop in enumerate(cssutils.parseStyle(tag['style']).getProperties()):
+                cascade.append((prop.priority == 'important', inline_specificity, 0, position, prop.name, prop.value))
+        cascade.sort(key=lambda entry: entry[:4])
+        style = {}
+        for important, _, _, _, name, value in cascade:
+            style.pop(name, None)
+            style[name] = f'{value} !important' if important else value
+        tag['style'] = '; '.join(f'{name}: {value}' for name, value in style.items())
+
     style_tag = soup.new_tag('style')
     style_tag.string = css
     soup.head.append(style_tag)
-    
+
     return str(soup)
 
 WORD_BANK = {
@@ -313,6 +446,7 @@ def generate_crosswords() -> dict:
              for direction in ['across', 'down']}
 
     # Create a crossword object
+    from crossword import Crossword
     puzzle = Crossword(13, 13, '-', 5000, words)
     
     # Create an empty grid and populate it with the puzzle
@@ -357,6 +491,41 @@ def get_email_recipients(df):
         for _, row in recipients.iterrows()
     ]
 
+def normalize_topic(topic):
+    """
+    Normalize an interest topic so that variants like ' AI ' and 'ai' share one news fetch.
+    """
+    return ' '.join(topic.split()).lower()
+
+def split_interests(interests):
+    """
+    Split the comma-separated 'Interests' cell into stripped, non-empty topics.
+    """
+    if not isinstance(interests, str):
+        return []
+    return [topic.strip() for topic in interests.split(',') if topic.strip()]
+
+def plan_recipient_fetches(recipients):
+    """
+    Compute the unique weather locations and news topics needed for a list of recipients.
+    Accepts the tuples returned by `get_email_recipients`.
+
+    Returns a dict with:
+        'locations': set of (city, country) pairs,
+        'topics': set of normalized topics,
+        'requested': number of weather/news requests a naive per-recipient loop would make.
+    """
+    locations = set()
+    topics = set()
+    requested = 0
+    for _, _, _, interests, city, country in recipients:
+        locations.add((city, country))
+        requested += 1
+        for topic in split_interests(interests):
+            topics.add(normalize_topic(topic))
+            requested += 1
+    return {'locations': locations, 'topics': topics, 'requested': requested}
+
 def update_recipient_counter(df, email):
     """
     Update the 'Days Receiving the email' counter for the given email.